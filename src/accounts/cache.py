@@ -0,0 +1,158 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import DEFAULT_DB_ALIAS
+from django_redis import get_redis_connection
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from config.breaker import get_breaker
+
+
+REDIS_KEY_NAMESPACE = "user"
+
+# cached besides the primary key; never the password hash itself
+CACHED_FIELDS = ("email", "is_active", "is_staff", "is_superuser")
+PASSWORD_MD5 = "password_md5"
+
+
+class UserCache:
+    """
+    Two-tier cache of user rows keyed by primary key.
+
+    Only the fields auth needs are cached (plus an md5 of the password hash
+    when SimpleJWT's CHECK_REVOKE_TOKEN is on); the rest stay deferred.
+
+    Tier 1 is a bounded in-process LRU with a short TTL (other workers can't
+    invalidate it, so it must expire quickly); tier 2 is Redis, invalidated
+    on user save/delete. Reads of the Redis tier go through the circuit breaker
+    and degrade to a miss, i.e. a normal DB load.
+    """
+
+    def __init__(
+        self,
+        *,
+        alias: str = "default",
+        prefix: str = REDIS_KEY_NAMESPACE,
+        ttl: Optional[int] = None,
+        local_ttl: Optional[float] = None,
+        max_size: Optional[int] = None,
+    ) -> None:
+        self._alias = alias
+        self.prefix = prefix
+        self.ttl = int(
+            getattr(settings, "USER_CACHE_TTL", 300)
+            if ttl is None
+            else ttl
+        )
+        self.local_ttl = float(
+            getattr(settings, "USER_CACHE_LOCAL_TTL", 30)
+            if local_ttl is None
+            else local_ttl
+        )
+        self.max_size = int(
+            getattr(settings, "USER_CACHE_MAX_SIZE", 1024)
+            if max_size is None
+            else max_size
+        )
+        # raw rows, so every request gets its own model instance
+        self._local: "OrderedDict[str, tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    # ---- internal helpers ----
+    def _r(self):
+        return get_redis_connection(self._alias)
+
+    @property
+    def breaker(self):
+        return get_breaker(self._alias)
+
+    def _key(self, user_id: Any) -> str:
+        return f"{self.prefix}:{user_id}:auth"
+
+    @staticmethod
+    def _fields():
+        # only what authentication/permission checks read; anything else is
+        # deferred and loaded from the DB on first access
+        # (in model order, as Model.from_db expects for partial rows)
+        return [
+            f for f in get_user_model()._meta.concrete_fields
+            if f.primary_key or f.name in CACHED_FIELDS
+        ]
+
+    def _dump(self, user) -> str:
+        data = {f.attname: getattr(user, f.attname) for f in self._fields()}
+        if api_settings.CHECK_REVOKE_TOKEN:
+            # a digest of the hash is enough to compare against the token claim
+            data[PASSWORD_MD5] = get_md5_hash_password(user.password)
+        return json.dumps(data)
+
+    def _load(self, raw: str):
+        data = json.loads(raw)
+        fields = self._fields()
+        names = [f.attname for f in fields]
+        values = [f.to_python(data.get(f.attname)) for f in fields]
+        user = get_user_model().from_db(DEFAULT_DB_ALIAS, names, values)
+        user.cached_password_md5 = data.get(PASSWORD_MD5)
+        return user
+
+    def _local_get(self, key: str) -> Optional[str]:
+        with self._lock:
+            item = self._local.get(key)
+            if item is None:
+                return None
+            expires, raw = item
+            if expires < time.monotonic():
+                del self._local[key]
+                return None
+            self._local.move_to_end(key)
+            return raw
+
+    def _local_set(self, key: str, raw: str) -> None:
+        if self.local_ttl <= 0 or self.max_size <= 0:
+            return
+        with self._lock:
+            self._local[key] = (time.monotonic() + self.local_ttl, raw)
+            self._local.move_to_end(key)
+            while len(self._local) > self.max_size:
+                self._local.popitem(last=False)
+
+    # ---- public ----
+    def get(self, user_id: Any):
+        key = self._key(user_id)
+        raw = self._local_get(key)
+        if raw is not None:
+            return self._load(raw)
+
+        raw = self.breaker.call(lambda: self._r().get(key))
+        if raw is None:
+            return None
+        if isinstance(raw, (bytes, bytearray)):
+            raw = raw.decode("utf-8")
+        self._local_set(key, raw)
+        return self._load(raw)
+
+    def set(self, user) -> None:
+        key = self._key(user.pk)
+        raw = self._dump(user)
+        self._local_set(key, raw)
+        if self.ttl > 0:
+            self.breaker.call(lambda: self._r().set(key, raw, ex=self.ttl))
+
+    def invalidate(self, user_id: Any) -> None:
+        key = self._key(user_id)
+        with self._lock:
+            self._local.pop(key, None)
+        self.breaker.call(lambda: self._r().delete(key))
+
+
+_default_user_cache = UserCache()
+
+get_cached_user = _default_user_cache.get
+cache_user = _default_user_cache.set
+invalidate_user = _default_user_cache.invalidate
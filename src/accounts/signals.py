@@ -0,0 +1,15 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import invalidate_user
+from .models import User
+
+
+@receiver(post_save, sender=User, dispatch_uid="accounts.invalidate_user_on_save")
+@receiver(post_delete, sender=User, dispatch_uid="accounts.invalidate_user_on_delete")
+def invalidate_user_cache(sender, instance: User, **kwargs):
+    # covers profile edits and PasswordChangeSerializer.save (update_fields=["password"])
+    user_id = instance.pk
+    invalidate_user(user_id)
+    transaction.on_commit(lambda: invalidate_user(user_id))
@@ -1,3 +1,37 @@
-from django.test import TestCase
+import json
+from unittest import mock
 
-# Create your tests here.
+from django.test import SimpleTestCase
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from .cache import UserCache
+from .models import User
+
+
+class UserCacheRowTests(SimpleTestCase):
+    def setUp(self):
+        self.cache = UserCache()
+        self.user = User(pk=7, email="a@example.com", first_name="Ann", is_staff=True)
+        self.user.set_password("correct horse")
+
+    def test_row_holds_only_auth_fields(self):
+        row = json.loads(self.cache._dump(self.user))
+        self.assertEqual(set(row), {"id", "email", "is_active", "is_staff", "is_superuser"})
+
+    def test_round_trip_defers_the_rest(self):
+        user = self.cache._load(self.cache._dump(self.user))
+        self.assertEqual(
+            (user.pk, user.email, user.is_active, user.is_staff, user.is_superuser),
+            (7, "a@example.com", True, True, False),
+        )
+        self.assertIn("password", user.get_deferred_fields())
+        self.assertIn("first_name", user.get_deferred_fields())
+        self.assertIsNone(user.cached_password_md5)
+
+    def test_password_digest_only_with_revoke_check(self):
+        with mock.patch("accounts.cache.api_settings") as jwt_settings:
+            jwt_settings.CHECK_REVOKE_TOKEN = True
+            raw = self.cache._dump(self.user)
+        self.assertNotIn(self.user.password, raw)
+        user = self.cache._load(raw)
+        self.assertEqual(user.cached_password_md5, get_md5_hash_password(self.user.password))
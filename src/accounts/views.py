@@ -22,9 +22,13 @@ class UserRetrieveAPIView(RetrieveAPIView):
     queryset = User.objects.all()
 
     def get_object(self):
-        return self.request.user
+        # request.user may come from the auth cache with most fields deferred
+        return User.objects.get(pk=self.request.user.pk)
 
 
 class PasswordChangeAPIView(UpdateAPIView):
     permission_classes = [IsAuthenticated,]
     serializer_class = PasswordChangeSerializer
+
+    def get_object(self):
+        return self.request.user
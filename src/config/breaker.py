@@ -0,0 +1,215 @@
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Optional
+
+from django.conf import settings
+from redis.exceptions import ConnectionError, RedisError, TimeoutError
+
+
+logger = logging.getLogger(__name__)
+
+# token for calls admitted while closed (never the half-open probe)
+_CALL = object()
+
+
+class CircuitBreaker:
+    """
+    Failure-rate circuit breaker for Redis calls.
+
+    closed    -> calls go through; outcomes are tracked over a sliding window.
+    open      -> calls are short-circuited to the fallback until reset_timeout.
+    half_open -> a single probe call is let through; success closes, failure re-opens.
+
+    Only connection errors and timeouts (incl. BusyLoadingError) count as
+    failures; error replies (ResponseError, OutOfMemoryError, ...) mean the
+    backend is up, so they just return the fallback.
+
+    `allow()` hands out a token that must be passed back to `record_success` /
+    `record_failure`; only the probe's own token may move the breaker out of
+    half_open (a call admitted while closed can finish after the breaker opened).
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    # numeric encoding for metrics scrapers
+    STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        failure_rate: Optional[float] = None,
+        min_calls: Optional[int] = None,
+        window: Optional[float] = None,
+        reset_timeout: Optional[float] = None,
+        exceptions: tuple = (ConnectionError, TimeoutError),
+        errors: tuple = (RedisError,),
+    ) -> None:
+        self.name = name
+        self.failure_rate = float(
+            getattr(settings, "REDIS_BREAKER_FAILURE_RATE", 0.5)
+            if failure_rate is None
+            else failure_rate
+        )
+        self.min_calls = int(
+            getattr(settings, "REDIS_BREAKER_MIN_CALLS", 10)
+            if min_calls is None
+            else min_calls
+        )
+        self.window = float(
+            getattr(settings, "REDIS_BREAKER_WINDOW", 30)
+            if window is None
+            else window
+        )
+        self.reset_timeout = float(
+            getattr(settings, "REDIS_BREAKER_RESET_TIMEOUT", 5)
+            if reset_timeout is None
+            else reset_timeout
+        )
+        self.exceptions = exceptions  # backend unavailable: counted as failures
+        self.errors = errors  # backend answered with an error: fallback, not counted
+
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._probe: Optional[object] = None  # token of the in-flight half-open probe
+        self._outcomes: deque = deque()  # (ts, ok)
+        self._short_circuited = 0
+        self._trips = 0
+
+    # ---- internal helpers ----
+    def _prune(self, now: float) -> None:
+        cutoff = now - self.window
+        while self._outcomes and self._outcomes[0][0] < cutoff:
+            self._outcomes.popleft()
+
+    def _transition(self, state: str) -> None:
+        if state == self._state:
+            return
+        logger.warning("circuit breaker %r: %s -> %s", self.name, self._state, state)
+        self._state = state
+        if state == self.OPEN:
+            self._opened_at = time.monotonic()
+            self._trips += 1
+        elif state == self.CLOSED:
+            self._outcomes.clear()
+        self._probe = None
+
+    # ---- public ----
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    def allow(self) -> Optional[object]:
+        """A call token, or None if the call must be short-circuited."""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return _CALL
+            if self._state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    self._short_circuited += 1
+                    return None
+                self._transition(self.HALF_OPEN)
+            # half-open: only one probe at a time
+            if self._probe is not None:
+                self._short_circuited += 1
+                return None
+            self._probe = object()
+            return self._probe
+
+    def record_success(self, token: Optional[object] = _CALL) -> None:
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                if token is self._probe:
+                    self._transition(self.CLOSED)
+                return
+            if self._state == self.OPEN:
+                return
+            now = time.monotonic()
+            self._outcomes.append((now, True))
+            self._prune(now)
+
+    def record_failure(self, token: Optional[object] = _CALL) -> None:
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                if token is self._probe:
+                    self._transition(self.OPEN)
+                return
+            if self._state == self.OPEN:
+                return
+            now = time.monotonic()
+            self._outcomes.append((now, False))
+            self._prune(now)
+            calls = len(self._outcomes)
+            if calls < self.min_calls:
+                return
+            failures = sum(1 for _, ok in self._outcomes if not ok)
+            if failures / calls >= self.failure_rate:
+                self._transition(self.OPEN)
+
+    def call(self, fn: Callable[..., Any], *args, fallback: Any = None, **kwargs) -> Any:
+        """Run fn through the breaker; return fallback when open or on a tracked error."""
+        token = self.allow()
+        if token is None:
+            return fallback
+        try:
+            result = fn(*args, **kwargs)
+        except self.exceptions as e:
+            logger.debug("circuit breaker %r: call failed: %s", self.name, e)
+            self.record_failure(token)
+            return fallback
+        except self.errors as e:
+            # e.g. OOM, WRONGTYPE or a script error: one bad key or a full
+            # instance must not open the breaker for every user of the alias
+            logger.warning("circuit breaker %r: call error: %s", self.name, e)
+            self.record_success(token)
+            return fallback
+        except Exception:
+            # Redis answered; the error is ours, not the backend's.
+            self.record_success(token)
+            raise
+        self.record_success(token)
+        return result
+
+    def snapshot(self) -> Dict[str, Any]:
+        state = self.state
+        with self._lock:
+            now = time.monotonic()
+            self._prune(now)
+            calls = len(self._outcomes)
+            failures = sum(1 for _, ok in self._outcomes if not ok)
+            return {
+                "name": self.name,
+                "state": state,
+                "state_value": self.STATE_VALUES[state],
+                "window_calls": calls,
+                "window_failures": failures,
+                "short_circuited": self._short_circuited,
+                "trips": self._trips,
+            }
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(alias: str = "default") -> CircuitBreaker:
+    """One breaker per Redis connection alias, shared by cache and analytics."""
+    with _breakers_lock:
+        breaker = _breakers.get(alias)
+        if breaker is None:
+            breaker = _breakers[alias] = CircuitBreaker(f"redis:{alias}")
+        return breaker
+
+
+def snapshot_all() -> list[dict]:
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return [b.snapshot() for b in breakers]
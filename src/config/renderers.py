@@ -0,0 +1,44 @@
+"""
+orjson-backed DRF renderer/parser. Wired into REST_FRAMEWORK only when
+orjson is installed (see settings); the stdlib JSON classes are the fallback.
+"""
+import orjson
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+
+_default = JSONEncoder().default  # Decimal, lazy strings, QuerySets, ...
+
+
+class ORJSONRenderer(BaseRenderer):
+    media_type = "application/json"
+    format = "json"
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        option = orjson.OPT_NON_STR_KEYS
+        # honour `Accept: application/json; indent=N` like JSONRenderer (orjson only does 2)
+        params = dict(
+            param.strip().split("=", 1)
+            for param in (accepted_media_type or "").split(";")[1:]
+            if "=" in param
+        )
+        if params.get("indent"):
+            option |= orjson.OPT_INDENT_2
+        ret = orjson.dumps(data, default=_default, option=option)
+        # same JS-safety escaping as JSONRenderer
+        return ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
+
+
+class ORJSONParser(BaseParser):
+    media_type = "application/json"
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f"JSON parse error - {exc}")
@@ -32,6 +32,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "links.middleware.RequestProfilerMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -113,10 +114,28 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 AUTH_USER_MODEL = 'accounts.User'
 
+# orjson is optional: used for API (de)serialization when installed
+try:
+    import orjson  # noqa: F401
+    _JSON_RENDERER = "config.renderers.ORJSONRenderer"
+    _JSON_PARSER = "config.renderers.ORJSONParser"
+except ImportError:
+    _JSON_RENDERER = "rest_framework.renderers.JSONRenderer"
+    _JSON_PARSER = "rest_framework.parsers.JSONParser"
+
 REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    'DEFAULT_RENDERER_CLASSES': (
+        _JSON_RENDERER,
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        _JSON_PARSER,
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
     'DEFAULT_AUTHENTICATION_CLASSES': (
-    'rest_framework_simplejwt.authentication.JWTAuthentication',
+    'accounts.authentication.CachedJWTAuthentication',
     ),
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 10,
@@ -132,6 +151,11 @@ SIMPLE_JWT = {
         ),
 }
 
+# Cached user lookup for JWT-authenticated requests
+USER_CACHE_TTL = int(os.environ.get("USER_CACHE_TTL", 300)) # Redis tier, seconds
+USER_CACHE_LOCAL_TTL = float(os.environ.get("USER_CACHE_LOCAL_TTL", 30)) # in-process tier, seconds
+USER_CACHE_MAX_SIZE = int(os.environ.get("USER_CACHE_MAX_SIZE", 1024)) # in-process entries
+
 SPECTACULAR_SETTINGS = {
     "TITLE": "URL Shortener API",
     "DESCRIPTION": "Shorten URLs with expiration and analytics.",
@@ -140,12 +164,93 @@ SPECTACULAR_SETTINGS = {
 
 BASE_URL = os.environ.get("BASE_URL", "http://localhost:8000/")
 
-CACHE_DEFAULT_TTL = int(os.environ.get("CACHE_DEFAULT_TTL", 604800)) # 7d
+CACHE_DEFAULT_TTL = int(os.environ.get("CACHE_DEFAULT_TTL", 604800)) # 7d, "warm" tier
+
+# Adaptive cache TTL: tier picked from a link's visits today + yesterday
+CACHE_HOT_MIN_VISITS = int(os.environ.get("CACHE_HOT_MIN_VISITS", 100))
+CACHE_WARM_MIN_VISITS = int(os.environ.get("CACHE_WARM_MIN_VISITS", 2)) # below -> "cold"
+CACHE_HOT_TTL = int(os.environ.get("CACHE_HOT_TTL", 0)) # 0 = pinned (no TTL)
+CACHE_COLD_TTL = int(os.environ.get("CACHE_COLD_TTL", 86400)) # 1d
+CACHE_PINNED_MAX = int(os.environ.get("CACHE_PINNED_MAX", 10000))
+CACHE_HOT_IDLE = int(os.environ.get("CACHE_HOT_IDLE", 3600)) # pinned w/o hits this long -> re-tiered
+CACHE_MEMORY_BUDGET = int(os.environ.get("CACHE_MEMORY_BUDGET", 0)) # bytes, 0 = unbounded
+CACHE_STATS_FLUSH_INTERVAL = float(os.environ.get("CACHE_STATS_FLUSH_INTERVAL", 10)) # seconds
+
 EXPIRED_TOMBSTONE_TTL = int(os.environ.get("EXPIRED_TOMBSTONE_TTL", 21600)) # 6h
 DAILY_BUCKET_TTL = int(os.environ.get("DAILY_BUCKET_TTL", 7776000)) # 90d
 
+# Per-link referrer/device/country breakdowns keep the top N values (rest -> "(other)")
+ANALYTICS_DIMENSION_TOP_N = int(os.environ.get("ANALYTICS_DIMENSION_TOP_N", 50))
+# Offline MaxMind-format country database (.mmdb, read with `maxminddb`)
+GEOIP_COUNTRY_DB = os.environ.get("GEOIP_COUNTRY_DB", "")
+
+# HTTP caching of redirects: permanent (301) links are cacheable for up to
+# REDIRECT_CACHE_MAX_AGE; temporary (302) ones only if REDIRECT_TEMPORARY_MAX_AGE > 0.
+# Both are capped by the link's expire_at.
+REDIRECT_CACHE_MAX_AGE = int(os.environ.get("REDIRECT_CACHE_MAX_AGE", 86400)) # 1d
+REDIRECT_TEMPORARY_MAX_AGE = int(os.environ.get("REDIRECT_TEMPORARY_MAX_AGE", 0))
+ANALYTICS_CACHE_TTL = int(os.environ.get("ANALYTICS_CACHE_TTL", 10)) # seconds
+
+# Return the existing code when a user shortens the same URL (same expiry and
+# redirect type) again, instead of inserting a duplicate row.
+LINK_DEDUP_ENABLED = os.environ.get("LINK_DEDUP_ENABLED", "0") == "1"
+LINK_DEDUP_TTL = int(os.environ.get("LINK_DEDUP_TTL", CACHE_DEFAULT_TTL)) # hash->code map in Redis
+
+# Redis token-bucket rate limits: `rate` tokens/second refill, `capacity` burst.
+# Redirects/beacons are keyed by client IP; create by user (or IP when anonymous).
+# Client IP = REMOTE_ADDR, or the X-Forwarded-For entry added by the outermost
+# of TRUSTED_PROXY_COUNT reverse proxies (set it to the number in front of Django).
+TRUSTED_PROXY_COUNT = int(os.environ.get("TRUSTED_PROXY_COUNT", 0))
+RATE_LIMIT_ENABLED = os.environ.get("RATE_LIMIT_ENABLED", "1") == "1"
+RATE_LIMITS = {
+    "redirect": {
+        "rate": float(os.environ.get("RATE_LIMIT_REDIRECT_RATE", 20)),
+        "capacity": int(os.environ.get("RATE_LIMIT_REDIRECT_BURST", 100)),
+    },
+    "beacon": {
+        "rate": float(os.environ.get("RATE_LIMIT_REDIRECT_RATE", 20)),
+        "capacity": int(os.environ.get("RATE_LIMIT_REDIRECT_BURST", 100)),
+    },
+    "create": {
+        "rate": float(os.environ.get("RATE_LIMIT_CREATE_RATE", 0.5)),
+        "capacity": int(os.environ.get("RATE_LIMIT_CREATE_BURST", 20)),
+    },
+}
+
+# Populate the redirect cache when a link is created (after commit);
+# async hands the write to Celery instead of the create request.
+LINK_CACHE_WRITE_THROUGH = os.environ.get("LINK_CACHE_WRITE_THROUGH", "1") == "1"
+LINK_CACHE_WRITE_THROUGH_ASYNC = os.environ.get("LINK_CACHE_WRITE_THROUGH_ASYNC", "0") == "1"
+
+# --- Request profiling ---
+# Spans are kept for every request while enabled; they are written out for a
+# random PROFILING_SAMPLE_RATE share, for requests carrying a signed
+# X-Profile-Token header (`manage.py profile_token`), and for requests slower
+# than PROFILING_SLOW_MS (at most one per PROFILING_SLOW_INTERVAL seconds per
+# process). Sampled/header requests also get stack samples.
+PROFILING_ENABLED = os.environ.get("PROFILING_ENABLED", "0") == "1"
+PROFILING_SAMPLE_RATE = float(os.environ.get("PROFILING_SAMPLE_RATE", 0.0))
+PROFILING_SLOW_MS = float(os.environ.get("PROFILING_SLOW_MS", 500))
+PROFILING_SLOW_INTERVAL = float(os.environ.get("PROFILING_SLOW_INTERVAL", 1.0))
+PROFILING_STACKS = os.environ.get("PROFILING_STACKS", "1") == "1"
+PROFILING_INTERVAL = float(os.environ.get("PROFILING_INTERVAL", 0.002)) # stack sampling, seconds
+PROFILING_TOKEN_MAX_AGE = int(os.environ.get("PROFILING_TOKEN_MAX_AGE", 3600))
+PROFILING_SINK = os.environ.get("PROFILING_SINK", "file") # "file" or "redis"
+PROFILING_DIR = os.environ.get("PROFILING_DIR", str(BASE_DIR / "profiles"))
+PROFILING_FILES_MAX = int(os.environ.get("PROFILING_FILES_MAX", 1000)) # oldest files are removed
+PROFILING_REDIS_KEY = os.environ.get("PROFILING_REDIS_KEY", "profiling:requests")
+PROFILING_REDIS_MAX = int(os.environ.get("PROFILING_REDIS_MAX", 1000))
+
 # --- Cache (Redis) ---
 REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379/0")
+REDIS_SOCKET_CONNECT_TIMEOUT = float(os.environ.get("REDIS_SOCKET_CONNECT_TIMEOUT", 0.2)) # seconds
+REDIS_SOCKET_TIMEOUT = float(os.environ.get("REDIS_SOCKET_TIMEOUT", 0.1)) # seconds
+
+# Circuit breaker around Redis in the redirect/analytics path
+REDIS_BREAKER_FAILURE_RATE = float(os.environ.get("REDIS_BREAKER_FAILURE_RATE", 0.5))
+REDIS_BREAKER_MIN_CALLS = int(os.environ.get("REDIS_BREAKER_MIN_CALLS", 10))
+REDIS_BREAKER_WINDOW = float(os.environ.get("REDIS_BREAKER_WINDOW", 30)) # seconds
+REDIS_BREAKER_RESET_TIMEOUT = float(os.environ.get("REDIS_BREAKER_RESET_TIMEOUT", 5)) # seconds
 
 CACHES = {
     "default": {
@@ -154,6 +259,8 @@ CACHES = {
     "OPTIONS": {
         "CLIENT_CLASS": "django_redis.client.DefaultClient",
         "REDIS_CLIENT_KWARGS": {"decode_responses": True},
+        "SOCKET_CONNECT_TIMEOUT": REDIS_SOCKET_CONNECT_TIMEOUT,
+        "SOCKET_TIMEOUT": REDIS_SOCKET_TIMEOUT,
         },
     "KEY_PREFIX": "urlshort",
     }
@@ -175,4 +282,9 @@ CELERY_BEAT_SCHEDULE = {
         "options": {"queue": "maintenance"},
         "kwargs": {"batch_size": 2000},
     },
+    "rebalance-link-cache": {
+        "task": "links.tasks.rebalance_link_cache",
+        "schedule": crontab(minute="*/5"),
+        "options": {"queue": "maintenance"},
+    },
 }
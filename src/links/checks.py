@@ -0,0 +1,31 @@
+from django.conf import settings
+from django.core.checks import Error, register
+
+
+@register()
+def geoip_database_check(app_configs, **kwargs):
+    """Fail at startup, not silently at lookup time, when the GeoIP file can't be used."""
+    path = getattr(settings, "GEOIP_COUNTRY_DB", "")
+    if not path:
+        return []
+    try:
+        import maxminddb
+    except ImportError:
+        return [
+            Error(
+                "GEOIP_COUNTRY_DB is set but the maxminddb package is not installed.",
+                hint="pip install -r requirements.txt, or unset GEOIP_COUNTRY_DB.",
+                id="links.E001",
+            )
+        ]
+    try:
+        maxminddb.open_database(path).close()
+    except (OSError, ValueError, RuntimeError) as e:
+        return [
+            Error(
+                f"GEOIP_COUNTRY_DB {path!r} could not be opened: {e}",
+                hint="Point it at a MaxMind-format country database (.mmdb).",
+                id="links.E002",
+            )
+        ]
+    return []
@@ -1,15 +1,29 @@
+from django.conf import settings
 from django.http.request import HttpRequest as DjangoRequest
 from rest_framework.request import Request as RestFrameworkRequest
 
 
 def get_client_ip(request: DjangoRequest | RestFrameworkRequest) -> str | None:
-    xff = request.META.get("HTTP_X_FORWARDED_FOR")
+    """
+    Client address as seen by the outermost of TRUSTED_PROXY_COUNT proxies.
+
+    Entries left of that are client-supplied and ignored, so X-Forwarded-For
+    can't be used to dodge per-IP rate limits. With no trusted proxies (the
+    default) only REMOTE_ADDR is used.
+    """
+    trusted = int(getattr(settings, "TRUSTED_PROXY_COUNT", 0))
+    xff = request.META.get("HTTP_X_FORWARDED_FOR") if trusted > 0 else None
     if xff:
-        ip = xff.split(",")[0].strip()
-        if ip:
-            return ip
+        hops = [ip.strip() for ip in xff.split(",") if ip.strip()]
+        if hops:
+            # each trusted proxy appends the address it received from
+            return hops[-trusted] if len(hops) >= trusted else hops[0]
     return request.META.get("REMOTE_ADDR")
 
 
 def get_user_agent(request: DjangoRequest | RestFrameworkRequest) -> str | None:
-    return request.META.get("HTTP_USER_AGENT")
\ No newline at end of file
+    return request.META.get("HTTP_USER_AGENT")
+
+
+def get_referrer(request: DjangoRequest | RestFrameworkRequest) -> str | None:
+    return request.META.get("HTTP_REFERER")
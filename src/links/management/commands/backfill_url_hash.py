@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from links.models import Link
+from links.services.dedup import url_hash
+
+
+class Command(BaseCommand):
+    help = "Fill in url_hash for links created before deduplication existed (idempotent)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=2000)
+
+    def handle(self, *args, batch_size: int, **options):
+        updated = 0
+        last_pk = 0
+        while True:
+            batch = list(
+                Link.objects
+                .filter(url_hash="", pk__gt=last_pk)
+                .order_by("pk")
+                .only("pk", "original_url")[:batch_size]
+            )
+            if not batch:
+                break
+            for link in batch:
+                link.url_hash = url_hash(link.original_url)
+            # bulk_update skips save()/signals: no cache or dedup entries exist for these rows yet
+            updated += Link.objects.bulk_update(batch, ["url_hash"])
+            last_pk = batch[-1].pk
+
+        self.stdout.write(f"backfilled url_hash for {updated} link(s)")
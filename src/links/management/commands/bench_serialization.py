@@ -0,0 +1,59 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from links.models import Link
+from links.serializers import LINK_LIST_FIELDS, LinkListSerializer, serialize_link_rows
+
+
+class Command(BaseCommand):
+    help = "Micro-benchmark serialize + render throughput for link listings (per 1,000 rows)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1000)
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def handle(self, *args, rows: int, repeat: int, **options):
+        now = timezone.now()
+        links = [
+            Link(
+                code=f"c{i}",
+                original_url=f"https://example.com/some/long/path/{i}?utm_source=bench",
+                expire_at=now + timedelta(days=i % 30) if i % 3 else None,
+                created_at=now - timedelta(seconds=i),
+            )
+            for i in range(rows)
+        ]
+        values = [tuple(getattr(link, f) for f in LINK_LIST_FIELDS) for link in links]
+
+        renderers = [("json", JSONRenderer())]
+        try:
+            from config.renderers import ORJSONRenderer
+
+            renderers.append(("orjson", ORJSONRenderer()))
+        except ImportError:
+            self.stdout.write("orjson not installed; skipping ORJSONRenderer")
+
+        paths = [
+            ("ModelSerializer", lambda: LinkListSerializer(links, many=True).data),
+            ("row fast path", lambda: serialize_link_rows(values)),
+        ]
+        for path_name, serialize in paths:
+            for renderer_name, renderer in renderers:
+                elapsed = self._time(lambda: renderer.render(serialize()), repeat)
+                per_k = elapsed / repeat / rows * 1000
+                self.stdout.write(
+                    f"{path_name:16} + {renderer_name:6}: {per_k * 1000:8.2f} ms / 1k rows "
+                    f"({rows / (elapsed / repeat):10.0f} rows/s)"
+                )
+
+    @staticmethod
+    def _time(fn, repeat: int) -> float:
+        fn()  # warm-up
+        start = time.perf_counter()
+        for _ in range(repeat):
+            fn()
+        return time.perf_counter() - start
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+
+from links.profiling import make_token
+
+
+class Command(BaseCommand):
+    help = "Print a signed X-Profile-Token header value (valid for PROFILING_TOKEN_MAX_AGE seconds)."
+
+    def handle(self, *args, **options):
+        self.stdout.write(make_token())
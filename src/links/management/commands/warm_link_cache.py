@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+
+from links.models import Link
+from links.services import cache as _cache
+from links.services.base62 import decode_many, encode_many, is_valid_code
+
+
+class Command(BaseCommand):
+    help = "Populate the redirect cache for the given codes, or for the most recently created live links."
+
+    def add_arguments(self, parser):
+        parser.add_argument("codes", nargs="*", help="short codes to warm (default: the --recent newest links)")
+        parser.add_argument("--recent", type=int, default=1000)
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, codes, recent: int, batch_size: int, **options):
+        live = Link.objects.filter(Q(expire_at__isnull=True) | Q(expire_at__gt=timezone.now()))
+        if codes:
+            invalid = [code for code in codes if not is_valid_code(code)]
+            if invalid:
+                self.stderr.write(f"skipping invalid codes: {' '.join(invalid)}")
+            # codes are base62 primary keys: look them up by pk, no code index scan
+            ids = decode_many(code for code in codes if is_valid_code(code))
+            live = live.filter(pk__in=ids)
+            limit = len(ids)
+        else:
+            limit = recent
+
+        rows = live.order_by("-pk").values_list("pk", "original_url", "expire_at", "redirect_type")
+        warmed = 0
+        for start in range(0, limit, batch_size):
+            batch = list(rows[start:min(start + batch_size, limit)])
+            if not batch:
+                break
+            for code, (_, url, expire_at, redirect_type) in zip(encode_many(row[0] for row in batch), batch):
+                expire_at_ts = int(expire_at.timestamp()) if expire_at else None
+                permanent = redirect_type == Link.RedirectType.PERMANENT
+                if _cache.cache_url(code, url, expire_at_ts, permanent):
+                    warmed += 1
+
+        self.stdout.write(f"warmed {warmed} link(s)")
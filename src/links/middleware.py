@@ -0,0 +1,79 @@
+import logging
+import random
+import threading
+import time
+
+from django.conf import settings
+
+from . import profiling
+
+
+logger = logging.getLogger(__name__)
+
+
+class RequestProfilerMiddleware:
+    """
+    Collects per-request timing spans (see profiling.span) and persists them for
+    sampled requests (PROFILING_SAMPLE_RATE or a signed X-Profile-Token header)
+    and for any request slower than PROFILING_SLOW_MS, at most one slow request
+    per PROFILING_SLOW_INTERVAL seconds per process. Sampled requests also run
+    the stack sampler when PROFILING_STACKS is on.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = getattr(settings, "PROFILING_ENABLED", False)
+        self.sample_rate = float(getattr(settings, "PROFILING_SAMPLE_RATE", 0.0))
+        self.slow_ms = float(getattr(settings, "PROFILING_SLOW_MS", 500))
+        self.slow_interval = float(getattr(settings, "PROFILING_SLOW_INTERVAL", 1.0))
+        self._next_slow = 0.0
+        self.stacks = getattr(settings, "PROFILING_STACKS", True)
+        self.interval = float(getattr(settings, "PROFILING_INTERVAL", 0.002))
+
+    def _reason(self, request):
+        token = request.headers.get("X-Profile-Token")
+        if token and profiling.check_token(token):
+            return "header"
+        if self.sample_rate and random.random() < self.sample_rate:
+            return "sampled"
+        return None
+
+    def __call__(self, request):
+        if not self.enabled:
+            return self.get_response(request)
+
+        profile = profiling.RequestProfile(self._reason(request))
+        sampler = None
+        if profile.reason and self.stacks:
+            sampler = profiling.StackSampler(threading.get_ident(), self.interval).start()
+
+        ctx = profiling.activate(profile)
+        try:
+            response = self.get_response(request)
+        finally:
+            profiling.deactivate(ctx)
+            if sampler is not None:
+                profile.stacks = sampler.stop()
+
+        duration_ms = (time.perf_counter() - profile.started) * 1000
+        if profile.reason is None and duration_ms >= self.slow_ms:
+            # an overloaded server makes every request slow; don't add disk
+            # writes to each of them
+            now = time.monotonic()
+            if now >= self._next_slow:
+                self._next_slow = now + self.slow_interval
+                profile.reason = "slow"
+        if profile.reason:
+            record = {
+                "ts": time.time(),
+                "method": request.method,
+                "path": request.path,
+                "status": response.status_code,
+                "duration_ms": round(duration_ms, 3),
+                **profile.as_dict(),
+            }
+            try:
+                profiling.write_record(record)
+            except OSError:
+                logger.exception("could not write profile for %s", request.path)
+        return response
@@ -4,17 +4,29 @@ from rest_framework.reverse import reverse
 from .models import Link
 
 
-class ShortURLMixin:
-    def get_short_url(self, obj: Link) -> str:
-        request = self.context.get("request")
-        # absolute when request is present
-        absolute_or_path = reverse("links:redirect", kwargs={"code": obj.code}, request=request)
-        if request:
-            return absolute_or_path
+_CODE_PLACEHOLDER = "__code__"
+
+
+def short_url_parts(request=None) -> tuple[str, str]:
+    """
+    (prefix, suffix) around the code in a short URL, so per-row work is just
+    concatenation. reverse() runs once per call.
+    """
+    # absolute when request is present
+    absolute_or_path = reverse("links:redirect", kwargs={"code": _CODE_PLACEHOLDER}, request=request)
+    if not request:
         # fallback to BASE_URL (or return relative path)
         base = getattr(settings, "BASE_URL", "").rstrip("/")
-        return (
-            urljoin(base + "/", absolute_or_path.lstrip("/")) 
-            if base 
-            else absolute_or_path
-        )
\ No newline at end of file
+        if base:
+            absolute_or_path = urljoin(base + "/", absolute_or_path.lstrip("/"))
+    prefix, _, suffix = absolute_or_path.partition(_CODE_PLACEHOLDER)
+    return prefix, suffix
+
+
+class ShortURLMixin:
+    def get_short_url(self, obj: Link) -> str:
+        # computed once per serializer; the list child is shared by every row
+        parts = getattr(self, "_short_url_parts", None)
+        if parts is None:
+            parts = self._short_url_parts = short_url_parts(self.context.get("request"))
+        return f"{parts[0]}{obj.code}{parts[1]}"
@@ -1,12 +1,20 @@
+from typing import Optional
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.db import models, transaction
 from django.utils import timezone
 from .services.base62 import encoder as _encode_base62
+from .services import cache as _cache
+from .services.dedup import url_hash as _url_hash
 
 
 User = get_user_model()
 
 class Link(models.Model):
+    class RedirectType(models.TextChoices):
+        TEMPORARY = "temporary", "Temporary (302)"
+        PERMANENT = "permanent", "Permanent (301)"
+
     created_by = models.ForeignKey(
         User,
         null=True,
@@ -15,11 +23,23 @@ class Link(models.Model):
         related_name="links",
     )
     original_url = models.URLField(max_length=2048)
+    # sha256 of the normalized URL; lets dedup lookups use an index instead of original_url
+    url_hash = models.CharField(max_length=64, editable=False, blank=True, default="")
     code = models.CharField(max_length=20, unique=True)
     expire_at = models.DateTimeField(null=True, blank=True, db_index=True)
+    redirect_type = models.CharField(
+        max_length=10,
+        choices=RedirectType.choices,
+        default=RedirectType.TEMPORARY,
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["created_by", "url_hash"], name="link_owner_url_hash_idx"),
+        ]
+
     def __str__(self):
         return f"{self.code} : {self.original_url}"
     
@@ -27,12 +47,51 @@ class Link(models.Model):
     def is_expired(self) -> bool:
         return bool(self.expire_at and timezone.now() >= self.expire_at)
 
+    @property
+    def is_permanent(self) -> bool:
+        return self.redirect_type == self.RedirectType.PERMANENT
+
+    @property
+    def expire_at_ts(self) -> Optional[int]:
+        return int(self.expire_at.timestamp()) if self.expire_at else None
+
+    @property
+    def dedup_key(self) -> tuple:
+        return (self.created_by_id, self.url_hash, self.expire_at_ts, self.redirect_type)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # remember the loaded dedup identity so edits can drop the stale entry
+        fields = {"created_by_id", "url_hash", "expire_at", "redirect_type"}
+        if fields.issubset(field_names):
+            instance._loaded_dedup_key = instance.dedup_key
+        return instance
 
     def save(self, *args, **kwargs):
+        self.url_hash = _url_hash(self.original_url)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "original_url" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "url_hash"}
+
         if not self.pk and not self.code:
             with transaction.atomic():
                 super().save(*args, **kwargs)
                 self.code = _encode_base62(self.pk)
                 super().save(update_fields=["code"])
+            self._warm_cache()
         else:
             super().save(*args, **kwargs)
+
+    def _warm_cache(self) -> None:
+        """Write-through: cache the new mapping once the row is committed."""
+        if not getattr(settings, "LINK_CACHE_WRITE_THROUGH", True):
+            return
+        # a brand-new link has no visits yet: start it in the cold tier
+        args = (self.code, self.original_url, self.expire_at_ts, self.is_permanent, 0)
+        if getattr(settings, "LINK_CACHE_WRITE_THROUGH_ASYNC", False):
+            from .tasks import warm_link_cache  # tasks imports models
+
+            transaction.on_commit(lambda: warm_link_cache.delay(*args))
+        else:
+            transaction.on_commit(lambda: _cache.cache_url(*args))
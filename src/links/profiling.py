@@ -0,0 +1,150 @@
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Optional
+
+from django.conf import settings
+from django.core import signing
+from django_redis import get_redis_connection
+
+from config.breaker import get_breaker
+
+
+SIGNING_SALT = "links.profiling"
+
+_current: ContextVar[Optional["RequestProfile"]] = ContextVar("links_request_profile", default=None)
+
+
+class RequestProfile:
+    """Timing spans (and optionally sampled stacks) for one request."""
+
+    def __init__(self, reason: Optional[str] = None) -> None:
+        self.reason = reason
+        self.started = time.perf_counter()
+        self.spans: list[tuple[str, float, float]] = []  # (name, start, end)
+        self.stacks: Optional[Counter] = None
+
+    def as_dict(self) -> dict:
+        return {
+            "reason": self.reason,
+            "spans": [
+                {
+                    "name": name,
+                    "start_ms": round((start - self.started) * 1000, 3),
+                    "duration_ms": round((end - start) * 1000, 3),
+                }
+                for name, start, end in self.spans
+            ],
+            "stacks": dict(self.stacks.most_common()) if self.stacks else None,
+        }
+
+
+def activate(profile: RequestProfile):
+    return _current.set(profile)
+
+
+def deactivate(token) -> None:
+    _current.reset(token)
+
+
+@contextmanager
+def span(name: str):
+    """Time a block of the current request; a no-op when profiling is off."""
+    profile = _current.get()
+    if profile is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.spans.append((name, start, time.perf_counter()))
+
+
+# ---- signed opt-in header ----
+def make_token() -> str:
+    return signing.TimestampSigner(salt=SIGNING_SALT).sign("profile")
+
+
+def check_token(token: str) -> bool:
+    max_age = int(getattr(settings, "PROFILING_TOKEN_MAX_AGE", 3600))
+    try:
+        return signing.TimestampSigner(salt=SIGNING_SALT).unsign(token, max_age=max_age) == "profile"
+    except signing.BadSignature:
+        return False
+
+
+# ---- statistical profiler ----
+class StackSampler:
+    """
+    Poor man's sampling profiler: a daemon thread snapshots the target
+    thread's stack every `interval` seconds and counts collapsed stacks
+    ("outer;inner;leaf"), ready for flamegraph tooling.
+    """
+
+    def __init__(self, thread_id: int, interval: float) -> None:
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="links-stack-sampler", daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})")
+                frame = frame.f_back
+            self.stacks[";".join(reversed(names))] += 1
+
+    def start(self) -> "StackSampler":
+        self._thread.start()
+        return self
+
+    def stop(self) -> Counter:
+        self._stop.set()
+        self._thread.join()
+        return self.stacks
+
+
+# ---- sinks ----
+def write_record(record: dict) -> None:
+    sink = getattr(settings, "PROFILING_SINK", "file")
+    raw = json.dumps(record, default=str)
+    if sink == "redis":
+        key = getattr(settings, "PROFILING_REDIS_KEY", "profiling:requests")
+        max_len = int(getattr(settings, "PROFILING_REDIS_MAX", 1000))
+
+        def push():
+            pipe = get_redis_connection("default").pipeline(transaction=False)
+            pipe.lpush(key, raw)
+            pipe.ltrim(key, 0, max_len - 1)
+            pipe.execute()
+
+        get_breaker("default").call(push)
+        return
+
+    directory = Path(getattr(settings, "PROFILING_DIR", "profiles"))
+    max_files = int(getattr(settings, "PROFILING_FILES_MAX", 1000))
+    directory.mkdir(parents=True, exist_ok=True)
+    name = f"{int(record['ts'] * 1000)}-{uuid.uuid4().hex[:8]}.json"
+    (directory / name).write_text(raw)
+    _prune(directory, max_files)
+
+
+def _prune(directory: Path, max_files: int) -> None:
+    # names start with the capture time in ms, so name order is age order
+    names = sorted(entry.name for entry in os.scandir(directory) if entry.name.endswith(".json"))
+    for name in names[:max(len(names) - max_files, 0)]:
+        (directory / name).unlink(missing_ok=True)
@@ -1,7 +1,12 @@
+from django.conf import settings
+from django.db import transaction
 from django.utils import timezone
 from rest_framework import serializers
 from .models import Link
-from .mixins import ShortURLMixin
+from .mixins import ShortURLMixin, short_url_parts
+from .services import cache as _cache
+from .services import dedup as _dedup
+from .services.base62 import decoder as _decode_base62
 
 
 class LinkCreateSerializer(ShortURLMixin, serializers.ModelSerializer):
@@ -11,7 +16,7 @@ class LinkCreateSerializer(ShortURLMixin, serializers.ModelSerializer):
 
     class Meta:
         model = Link
-        fields = ("original_url", "expire_at", "short_url")
+        fields = ("original_url", "expire_at", "redirect_type", "short_url")
 
     def validate_expire_at(self, value):
         if value and value <= timezone.now():
@@ -22,7 +27,59 @@ class LinkCreateSerializer(ShortURLMixin, serializers.ModelSerializer):
         request = self.context.get("request")
         user = getattr(request, "user", None)
         created_by = user if (user and user.is_authenticated) else None
-        return Link.objects.create(created_by=created_by, **validated_data)
+        if not getattr(settings, "LINK_DEDUP_ENABLED", False):
+            return Link.objects.create(created_by=created_by, **validated_data)
+
+        link = self._find_duplicate(created_by, validated_data)
+        if link is None:
+            link = Link.objects.create(created_by=created_by, **validated_data)
+        dedup_key = link.dedup_key
+        transaction.on_commit(lambda: _dedup.remember(*dedup_key, link.code))
+        return link
+
+    @staticmethod
+    def _find_duplicate(created_by, validated_data) -> Link | None:
+        """Same owner, URL, expiry and redirect type -> reuse the existing code."""
+        url = validated_data["original_url"]
+        expire_at = validated_data.get("expire_at")
+        redirect_type = validated_data.get("redirect_type", Link.RedirectType.TEMPORARY)
+        probe = Link(
+            created_by=created_by,
+            original_url=url,
+            url_hash=_dedup.url_hash(url),
+            expire_at=expire_at,
+            redirect_type=redirect_type,
+        )
+
+        # 1) Redis hash -> code map: answer without touching the DB, but only if
+        #    the code's cached redirect still points at this URL/expiry/type
+        #    (edits that bypass save() leave the dedup entry stale)
+        code = _dedup.get_code(*probe.dedup_key)
+        if code:
+            entry = _cache.get_cached_link(code)
+            if entry and (
+                _dedup.url_hash(entry.url) == probe.url_hash
+                and entry.expire_at_ts == probe.expire_at_ts
+                and entry.permanent == probe.is_permanent
+            ):
+                probe.pk = _decode_base62(code)
+                probe.code = code
+                probe._state.adding = False
+                return probe
+
+        # 2) Indexed lookup on (created_by, url_hash)
+        candidates = Link.objects.filter(
+            created_by=created_by,
+            url_hash=probe.url_hash,
+            expire_at=expire_at,
+            redirect_type=redirect_type,
+        ).only("code", "original_url", "expire_at", "redirect_type", "created_by", "url_hash")
+        normalized = _dedup.normalize_url(url)
+        for link in candidates[:5]:
+            # guard against (astronomically unlikely) digest collisions
+            if _dedup.normalize_url(link.original_url) == normalized:
+                return link
+        return None
 
     
 class LinkListSerializer(ShortURLMixin, serializers.ModelSerializer):
@@ -30,4 +87,38 @@ class LinkListSerializer(ShortURLMixin, serializers.ModelSerializer):
 
     class Meta:
         model = Link
-        fields = ("original_url", "expire_at", "created_at", "short_url")
\ No newline at end of file
+        fields = ("original_url", "expire_at", "redirect_type", "created_at", "short_url")
+
+
+LINK_LIST_FIELDS = ("code", "original_url", "expire_at", "redirect_type", "created_at")
+
+
+def _iso(value, tz):
+    # Same output as DRF's DateTimeField for aware datetimes.
+    if value is None:
+        return None
+    if value.tzinfo is not tz:
+        value = value.astimezone(tz)
+    value = value.isoformat()
+    if value.endswith("+00:00"):
+        value = value[:-6] + "Z"
+    return value
+
+
+def serialize_link_rows(rows, request=None) -> list[dict]:
+    """
+    Fast path for LinkListSerializer output: takes `values_list(*LINK_LIST_FIELDS)`
+    rows and skips per-field ModelSerializer machinery.
+    """
+    prefix, suffix = short_url_parts(request)
+    tz = timezone.get_current_timezone()
+    return [
+        {
+            "original_url": original_url,
+            "expire_at": _iso(expire_at, tz),
+            "redirect_type": redirect_type,
+            "created_at": _iso(created_at, tz),
+            "short_url": f"{prefix}{code}{suffix}",
+        }
+        for code, original_url, expire_at, redirect_type, created_at in rows
+    ]
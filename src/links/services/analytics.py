@@ -6,14 +6,51 @@ from typing import Optional
 from django.conf import settings
 from django_redis import get_redis_connection
 
+from config.breaker import get_breaker
+from . import dimensions as _dims
+
 PREFIX = "link"
 
+OTHER = "(other)"
+
+# Keep the `keep` largest fields of a dimension hash and fold the rest into OTHER.
+TRUNCATE_LUA = """
+local keep = tonumber(ARGV[1])
+local other = ARGV[2]
+local flat = redis.call('HGETALL', KEYS[1])
+local items = {}
+for i = 1, #flat, 2 do
+  if flat[i] ~= other then
+    items[#items + 1] = {flat[i], tonumber(flat[i + 1])}
+  end
+end
+if #items <= keep then
+  return 0
+end
+table.sort(items, function(a, b) return a[2] > b[2] end)
+local dropped = 0
+for i = keep + 1, #items do
+  redis.call('HDEL', KEYS[1], items[i][1])
+  dropped = dropped + items[i][2]
+end
+redis.call('HINCRBY', KEYS[1], other, dropped)
+return #items - keep
+"""
+
+# dimension name -> key suffix
+DIMENSIONS = {
+    "referrers": "ref",
+    "devices": "ua",
+    "countries": "geo",
+}
+
 class LinkAnalytics:
     prefix = PREFIX
+    alias = "default"
 
-    @staticmethod
-    def _r():
-        return get_redis_connection("default")
+    @classmethod
+    def _r(cls):
+        return get_redis_connection(cls.alias)
 
     @staticmethod
     def _bucket(ts: Optional[int] = None) -> str:
@@ -38,29 +75,124 @@ class LinkAnalytics:
         return f"{cls.prefix}:{code}:visits:{bucket}"
 
     @classmethod
-    def record_visit(cls, code: str, ip: Optional[str], ua: Optional[str]) -> None:
-        r = cls._r()
-        r.incr(cls._key_visits(code))
-        r.pfadd(cls._key_uv(code), cls._fingerprint(ip, ua))
+    def _key_dimension(cls, code: str, dimension: str) -> str:
+        return f"{cls.prefix}:{code}:{DIMENSIONS[dimension]}"
+
+    @classmethod
+    def record_visit(
+        cls,
+        code: str,
+        ip: Optional[str],
+        ua: Optional[str],
+        referrer: Optional[str] = None,
+    ) -> Optional[int]:
+        """Returns today's visit count for the link (None if the visit was dropped)."""
+        # Best-effort: visits are dropped while Redis is failing or the breaker is open.
+        return get_breaker(cls.alias).call(cls._record_visit, code, ip, ua, referrer)
+
+    @classmethod
+    def _record_visit(
+        cls,
+        code: str,
+        ip: Optional[str],
+        ua: Optional[str],
+        referrer: Optional[str],
+    ) -> int:
+        values = {
+            "referrers": _dims.referrer_host(referrer),
+            "devices": _dims.classify_user_agent(ua),
+            "countries": _dims.country_for_ip(ip),
+        }
         daily_key = cls._key_visits_daily(code, cls._bucket())
-        r.incr(daily_key)
-        r.expire(daily_key, max(1, int(settings.DAILY_BUCKET_TTL)))
+        pipe = cls._r().pipeline(transaction=False)
+        pipe.incr(cls._key_visits(code))
+        pipe.pfadd(cls._key_uv(code), cls._fingerprint(ip, ua))
+        pipe.incr(daily_key)
+        pipe.expire(daily_key, max(1, int(settings.DAILY_BUCKET_TTL)))
+        for dimension, value in values.items():
+            key = cls._key_dimension(code, dimension)
+            pipe.hincrby(key, value, 1)
+            pipe.hlen(key)
+        res = pipe.execute()
+
+        # Truncate only once a hash has grown well past top-N, so the
+        # HGETALL + sort runs rarely instead of on every visit.
+        top_n = int(getattr(settings, "ANALYTICS_DIMENSION_TOP_N", 50))
+        limit = top_n * 2
+        for i, dimension in enumerate(values):
+            if int(res[5 + 2 * i]) > limit:
+                cls._truncate(cls._key_dimension(code, dimension), top_n)
+        return int(res[2])
+
+    @classmethod
+    def _truncate(cls, key: str, keep: int) -> None:
+        cls._r().eval(TRUNCATE_LUA, 1, key, keep, OTHER)
 
     @classmethod
     def get_counts(cls, code: str) -> dict:
-        r = cls._r()
-        visits = int(r.get(cls._key_visits(code)) or 0)
-        uniques = int(r.pfcount(cls._key_uv(code)) or 0)
-        return {"visits": visits, "unique_visitors": uniques}
+        def read():
+            pipe = cls._r().pipeline(transaction=False)
+            pipe.get(cls._key_visits(code))
+            pipe.pfcount(cls._key_uv(code))
+            return pipe.execute()
+
+        visits, uniques = get_breaker(cls.alias).call(read, fallback=(0, 0))
+        return {"visits": int(visits or 0), "unique_visitors": int(uniques or 0)}
+
+    @classmethod
+    def get_dimensions(cls, code: str) -> dict:
+        """Per-dimension breakdowns, largest first, in one round trip (empty while Redis is down)."""
+        def read():
+            pipe = cls._r().pipeline(transaction=False)
+            for dimension in DIMENSIONS:
+                pipe.hgetall(cls._key_dimension(code, dimension))
+            return pipe.execute()
+
+        results = get_breaker(cls.alias).call(read, fallback=[{} for _ in DIMENSIONS])
+        out = {}
+        for dimension, raw in zip(DIMENSIONS, results):
+            rows = [
+                {
+                    "value": k.decode() if isinstance(k, bytes) else k,
+                    "visits": int(v),
+                }
+                for k, v in raw.items()
+            ]
+            rows.sort(key=lambda row: row["visits"], reverse=True)
+            out[dimension] = rows
+        return out
+
+    @classmethod
+    def get_recent_visits(cls, code: str) -> Optional[int]:
+        """Visits today + yesterday (drives the cache TTL tier); None if Redis is unavailable."""
+        return cls.get_recent_visits_many([code]).get(code)
+
+    @classmethod
+    def get_recent_visits_many(cls, codes: list[str]) -> dict[str, int]:
+        """{code: visits today + yesterday} in one MGET; empty if Redis is unavailable."""
+        now = int(time.time())
+        buckets = [cls._bucket(now - i * 86400) for i in range(2)]
+        keys = [cls._key_visits_daily(code, bucket) for code in codes for bucket in buckets]
+        if not keys:
+            return {}
+        values = get_breaker(cls.alias).call(lambda: cls._r().mget(keys))
+        if values is None:
+            return {}
+        n = len(buckets)
+        return {
+            code: sum(int(v or 0) for v in values[i * n:(i + 1) * n])
+            for i, code in enumerate(codes)
+        }
 
     @classmethod
     def get_daily(cls, code: str, days: int = 30) -> list[dict]:
-        r = cls._r()
-        out = []
         now = int(time.time())
-        for i in range(days):
-            ts = now - i * 86400
-            bucket = cls._bucket(ts)
-            val = int(r.get(cls._key_visits_daily(code, bucket)) or 0)
-            out.append({"date": bucket, "visits": val})
-        return list(reversed(out))
+        buckets = [cls._bucket(now - i * 86400) for i in reversed(range(days))]
+        keys = [cls._key_visits_daily(code, bucket) for bucket in buckets]
+        if not keys:
+            return []
+        values = get_breaker(cls.alias).call(lambda: cls._r().mget(keys), fallback=[None] * days)
+        return [
+            {"date": bucket, "visits": int(val or 0)}
+            for bucket, val in zip(buckets, values)
+        ]
@@ -1,9 +1,13 @@
+import re
 import string
-from typing import Dict, Callable
+from typing import Dict, Callable, Iterable, List
 
 
 DEFAULT_ALPHABET = string.digits + string.ascii_letters
 
+# Codes are derived from BigAutoField primary keys.
+DEFAULT_MAX_VALUE = 2**63 - 1
+
 
 
 class Base62:
@@ -12,7 +16,7 @@ class Base62:
     """
     
 
-    def __init__(self, alphabet: str = DEFAULT_ALPHABET) -> None:
+    def __init__(self, alphabet: str = DEFAULT_ALPHABET, max_value: int = DEFAULT_MAX_VALUE) -> None:
         if len(set(alphabet)) != len(alphabet):
             raise ValueError("Alphabet must contain unique characters.")
         
@@ -23,6 +27,20 @@ class Base62:
         self.base: int = len(alphabet)
         self._index: Dict[str, int] = {ch: i for i, ch in enumerate(alphabet)}
 
+        # Two-digit table: halves the number of divmod steps in encode_many.
+        self._pairs: List[str] = [a + b for a in alphabet for b in alphabet]
+        self._base2: int = self.base * self.base
+
+        # Precompiled validator: canonical codes only (no leading zero digit),
+        # no longer than the largest possible ID.
+        self.max_value: int = max_value
+        self.max_code: str = self.encode(max_value)
+        self.max_length: int = len(self.max_code)
+        chars = re.escape(alphabet)
+        self._valid_re = re.compile(
+            f"{re.escape(alphabet[0])}|[{re.escape(alphabet[1:])}][{chars}]{{0,{self.max_length - 1}}}"
+        )
+
     def encode(self, num: int) -> str:
         """Encode a non-negative integer to a base-N string (N=len(alphabet))."""
         if not isinstance(num, int):
@@ -57,9 +75,59 @@ class Base62:
             n = n * self.base + val
         return n
 
+    def is_valid(self, s: str) -> bool:
+        """Cheap check that s is a canonical code within the ID range (bounded work)."""
+        if not isinstance(s, str) or not self._valid_re.fullmatch(s):
+            return False
+        if len(s) < self.max_length:
+            return True
+        return self.decode(s) <= self.max_value
+
+    def encode_many(self, nums: Iterable[int]) -> List[str]:
+        """Encode many non-negative integers, two digits per step."""
+        pairs, base, base2 = self._pairs, self.base, self._base2
+        alphabet = self.alphabet
+        out = []
+        for num in nums:
+            if not isinstance(num, int):
+                raise TypeError("num must be an int.")
+            if num < 0:
+                raise ValueError("num must be non-negative.")
+            if num < base:
+                out.append(alphabet[num])
+                continue
+            chunks = []
+            n = num
+            while n >= base2:
+                n, rem = divmod(n, base2)
+                chunks.append(pairs[rem])
+            chunks.append(alphabet[n] if n < base else pairs[n])
+            out.append("".join(reversed(chunks)))
+        return out
+
+    def decode_many(self, codes: Iterable[str]) -> List[int]:
+        """Decode many codes with the lookups hoisted out of the loop."""
+        index, base = self._index, self.base
+        out = []
+        for s in codes:
+            if not isinstance(s, str):
+                raise TypeError("s must be a str.")
+            if not s:
+                raise ValueError("s must be a non-empty string.")
+            n = 0
+            try:
+                for ch in s:
+                    n = n * base + index[ch]
+            except KeyError as e:
+                raise ValueError(f"Invalid character for this alphabet: {e.args[0]!r}") from e
+            out.append(n)
+        return out
 
 
 _default_b62 = Base62()
 
 encoder: Callable[[int], str] = _default_b62.encode
 decoder: Callable[[str], int] = _default_b62.decode
+is_valid_code: Callable[[str], bool] = _default_b62.is_valid
+encode_many: Callable[[Iterable[int]], List[str]] = _default_b62.encode_many
+decode_many: Callable[[Iterable[str]], List[int]] = _default_b62.decode_many
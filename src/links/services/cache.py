@@ -1,14 +1,64 @@
+import threading
 import time
-from typing import Optional
+from collections import Counter
+from typing import NamedTuple, Optional
 from django.conf import settings
 from django_redis import get_redis_connection
-from redis import RedisError
+from config.breaker import get_breaker
 
 
 REDIS_KEY_NAMESPACE = "link"
 
+# TTL tiers, picked from a link's recent visit count
+HOT = "hot"
+WARM = "warm"
+COLD = "cold"
+TIERS = (HOT, WARM, COLD)
+_TIER_FLAGS = {HOT: "h", WARM: "w", COLD: "c"}
+_FLAG_TIERS = {v: k for k, v in _TIER_FLAGS.items()}
+
+# Move a pinned code to another tier: drop it from the hot set and rewrite the
+# tier flag + TTL in one step, so a concurrent invalidation can't be undone.
+DEMOTE_LUA = """
+local v = redis.call('GET', KEYS[1])
+redis.call('ZREM', KEYS[2], ARGV[1])
+if not v then
+  return 0
+end
+if string.sub(v, 3, 3) == '|' then
+  v = string.sub(v, 1, 1) .. ARGV[2] .. string.sub(v, 3)
+end
+local ttl = tonumber(ARGV[3])
+if ttl > 0 then
+  redis.call('SET', KEYS[1], v, 'EX', ttl)
+else
+  redis.call('SET', KEYS[1], v)
+end
+return 1
+"""
+
+
+class CachedLink(NamedTuple):
+    url: str
+    expire_at_ts: Optional[int]
+    permanent: bool
+    tier: str = WARM
+
 class LinkCache:
-    """Cache layer for short-link URLs with tombstone support."""
+    """
+    Cache layer for short-link URLs with tombstone support.
+
+    Every Redis call goes through the alias' circuit breaker: on errors or while
+    the breaker is open, reads degrade to a miss and writes are skipped, so the
+    redirect path falls back to the DB instead of failing.
+
+    TTLs adapt to access frequency: hot links get CACHE_HOT_TTL (0 = pinned, no
+    TTL, which `volatile-*` eviction policies never evict), cold ones
+    CACHE_COLD_TTL, everything else CACHE_DEFAULT_TTL. Pinned codes are kept
+    in a sorted set scored by their last hit; codes idle for CACHE_HOT_IDLE are
+    re-tiered from their visit counts, and the least recently hit are demoted
+    when the set outgrows CACHE_PINNED_MAX or Redis its memory budget.
+    """
 
     def __init__(
         self,
@@ -34,68 +84,346 @@ class LinkCache:
         )
         self.encoding = encoding
 
+        self.hot_min_visits = int(getattr(settings, "CACHE_HOT_MIN_VISITS", 100))
+        self.warm_min_visits = int(getattr(settings, "CACHE_WARM_MIN_VISITS", 2))
+        self.hot_ttl = int(getattr(settings, "CACHE_HOT_TTL", 0))
+        self.cold_ttl = int(getattr(settings, "CACHE_COLD_TTL", 86400))
+        self.pinned_max = int(getattr(settings, "CACHE_PINNED_MAX", 10000))
+        self.hot_idle = int(getattr(settings, "CACHE_HOT_IDLE", 3600))
+        self.memory_budget = int(getattr(settings, "CACHE_MEMORY_BUDGET", 0))
+        self.stats_flush_interval = float(getattr(settings, "CACHE_STATS_FLUSH_INTERVAL", 10))
+
+        # per-tier hit/miss counts and pinned codes hit since the last flush,
+        # written to Redis every stats_flush_interval
+        self._stats: Counter = Counter()
+        self._touched: set[str] = set()
+        self._stats_flushed = time.monotonic()
+        self._stats_lock = threading.Lock()
+        self._script = None
+
     # ---- internal helpers ----
     def _r(self):
         return get_redis_connection(self._alias)
 
+    @property
+    def breaker(self):
+        return get_breaker(self._alias)
+
     def _key_url(self, code: str) -> str:
         return f"{self.prefix}:{code}:url"
 
     def _key_tomb(self, code: str) -> str:
         return f"{self.prefix}:{code}:expired"
 
+    def _key_hotset(self) -> str:
+        return f"{self.prefix}:cache:pinned"
+
+    def _key_stats(self) -> str:
+        return f"{self.prefix}:cache:stats"
+
+    def _demote_script(self):
+        if self._script is None:
+            self._script = self._r().register_script(DEMOTE_LUA)
+        return self._script
+
+    @staticmethod
+    def _pack(url: str, expire_at_ts: Optional[int], permanent: bool, tier: str = WARM) -> str:
+        # "<p|t><tier>|<expire_ts or empty>|<url>" -- keeps the redirect policy
+        # next to the URL so a cache hit can build the response without the DB.
+        flag = ("p" if permanent else "t") + _TIER_FLAGS[tier]
+        return f"{flag}|{'' if expire_at_ts is None else int(expire_at_ts)}|{url}"
+
+    @staticmethod
+    def _unpack(val: str) -> CachedLink:
+        flag, sep1, rest = val.partition("|")
+        ts, sep2, url = rest.partition("|")
+        valid = (
+            1 <= len(flag) <= 2
+            and flag[0] in ("p", "t")
+            and (len(flag) == 1 or flag[1] in _FLAG_TIERS)
+        )
+        if not valid or not sep1 or not sep2 or not (ts == "" or ts.isdigit()):
+            # plain URL written before the redirect policy was cached
+            return CachedLink(val, None, False)
+        tier = _FLAG_TIERS[flag[1]] if len(flag) == 2 else WARM
+        return CachedLink(url, int(ts) if ts else None, flag[0] == "p", tier)
+
+    def _tier_ttl(self, tier: str) -> int:
+        """0 means no TTL."""
+        if tier == HOT:
+            return self.hot_ttl
+        if tier == COLD:
+            return self.cold_ttl
+        return self.default_ttl
+
     # ---- public ----
-    def cache_url(self, code: str, url: str, expire_at_ts: Optional[int]) -> None:
-        r = self._r()
+    def pick_tier(self, recent_visits: Optional[int]) -> str:
+        """Tier for a link with `recent_visits` (today + yesterday); unknown (None) -> warm."""
+        if recent_visits is None:
+            return WARM
+        if recent_visits >= self.hot_min_visits:
+            return HOT
+        if recent_visits < self.warm_min_visits:
+            return COLD
+        return WARM
+
+    def cache_url(
+        self,
+        code: str,
+        url: str,
+        expire_at_ts: Optional[int],
+        permanent: bool = False,
+        recent_visits: Optional[int] = None,
+    ) -> Optional[str]:
+        """Cache the mapping with a frequency-based TTL; returns the tier used."""
         key = self._key_url(code)
+        tier = self.pick_tier(recent_visits)
+        url = self._pack(url, expire_at_ts, permanent, tier)
+        ttl = self._tier_ttl(tier)
 
         if expire_at_ts is not None:
             now = int(time.time())
-            ttl = int(expire_at_ts) - now
-            if ttl <= 0:
+            remaining = int(expire_at_ts) - now
+            if remaining <= 0:
                 # Already expired; don't cache.
-                return
-            r.set(key, url, ex=ttl)
-            return
+                return None
+            ttl = min(ttl, remaining) if ttl > 0 else remaining
+            self.breaker.call(lambda: self._r().set(key, url, ex=ttl))
+            return tier
 
-        if self.default_ttl > 0:
-            r.set(key, url, ex=self.default_ttl)
+        if ttl > 0:
+            self.breaker.call(lambda: self._r().set(key, url, ex=ttl))
+        elif tier == HOT:
+            self.breaker.call(self._pin, code, key, url)
         else:
-            r.set(key, url)
+            self.breaker.call(lambda: self._r().set(key, url))
+        return tier
 
-    def get_cached_url(self, code: str) -> Optional[str]:
+    def _pin(self, code: str, key: str, value: str) -> None:
+        pipe = self._r().pipeline(transaction=False)
+        pipe.set(key, value)
+        pipe.zadd(self._key_hotset(), {code: time.time()})
+        pipe.zcard(self._key_hotset())
+        size = pipe.execute()[-1]
+        if size > self.pinned_max:
+            self._unpin_oldest(size - self.pinned_max)
+
+    def _unpin_oldest(self, count: int) -> int:
+        """Demote the `count` least recently hit pinned codes to the warm tier."""
+        popped = self._r().zpopmin(self._key_hotset(), count)
+        return self._demote({
+            (member.decode() if isinstance(member, bytes) else member): WARM
+            for member, _ in popped
+        })
+
+    def _demote(self, tiers: dict[str, str]) -> int:
+        if not tiers:
+            return 0
+        script = self._demote_script()
+        pipe = self._r().pipeline(transaction=False)
+        for code, tier in tiers.items():
+            script(
+                keys=[self._key_url(code), self._key_hotset()],
+                args=[code, _TIER_FLAGS[tier], self._tier_ttl(tier)],
+                client=pipe,
+            )
+        return sum(pipe.execute())
+
+    def idle_pinned(self, limit: int = 1000) -> list[str]:
+        """Pinned codes without a hit for CACHE_HOT_IDLE seconds."""
+        cutoff = time.time() - self.hot_idle
+        members = self.breaker.call(
+            lambda: self._r().zrangebyscore(self._key_hotset(), "-inf", cutoff, start=0, num=limit),
+            fallback=[],
+        )
+        return [m.decode() if isinstance(m, bytes) else m for m in members]
+
+    def retier(self, recent_visits: dict[str, int]) -> dict:
+        """Re-check pinned codes against their visit counts; still-hot ones stay pinned."""
+        now = time.time()
+        demote, keep = {}, {}
+        for code, visits in recent_visits.items():
+            tier = self.pick_tier(visits)
+            if tier == HOT:
+                keep[code] = now
+            else:
+                demote[code] = tier
+
+        def apply():
+            if keep:
+                self._r().zadd(self._key_hotset(), keep, xx=True)
+            return self._demote(demote)
+
+        demoted = self.breaker.call(apply, fallback=0)
+        return {"checked": len(recent_visits), "demoted": demoted}
+
+    def maybe_promote(self, code: str, today_visits: Optional[int]) -> None:
+        """Re-cache as hot the moment today's visits cross the hot threshold."""
+        if today_visits != self.hot_min_visits:
+            return
+        entry = self.get_cached_link(code)
+        if entry is None or entry.tier == HOT:
+            return
+        self.cache_url(code, entry.url, entry.expire_at_ts, entry.permanent, today_visits)
+
+    def record_lookup(self, tier: Optional[str], hit: bool, code: Optional[str] = None) -> None:
+        """Count a hit/miss for `tier` (and refresh a pinned code's score); flushed in batches."""
+        if tier is None:
+            return
+        flush = None
+        with self._stats_lock:
+            self._stats[f"{tier}:{'hits' if hit else 'misses'}"] += 1
+            if hit and tier == HOT and code:
+                self._touched.add(code)
+            now = time.monotonic()
+            if now - self._stats_flushed >= self.stats_flush_interval:
+                flush = self._take_stats(now)
+        if flush:
+            self.breaker.call(self._flush_stats, *flush)
+
+    def _take_stats(self, now: float) -> tuple[Counter, set[str]]:
+        # caller holds _stats_lock
+        stats, touched = self._stats, self._touched
+        self._stats, self._touched = Counter(), set()
+        self._stats_flushed = now
+        return stats, touched
+
+    def _flush_stats(self, stats: Counter, touched: set[str]) -> None:
+        pipe = self._r().pipeline(transaction=False)
+        for field, n in stats.items():
+            pipe.hincrby(self._key_stats(), field, n)
+        if touched:
+            # XX: never re-pin a code that was invalidated or demoted meanwhile
+            now = time.time()
+            pipe.zadd(self._key_hotset(), {code: now for code in touched}, xx=True)
+        pipe.execute()
+
+    def enforce_memory_budget(self, fraction: float = 0.25) -> dict:
+        """Demote a share of the pinned set while Redis uses more than CACHE_MEMORY_BUDGET."""
         r = self._r()
-        key = self._key_url(code)
-        val = r.get(key)
+        used = int(r.info("memory").get("used_memory", 0))
+        demoted = 0
+        if self.memory_budget and used > self.memory_budget:
+            pinned = r.zcard(self._key_hotset())
+            demoted = self._unpin_oldest(max(1, int(pinned * fraction))) if pinned else 0
+        return {"used_memory": used, "memory_budget": self.memory_budget, "demoted": demoted}
+
+    def tier_report(self) -> dict:
+        """Hit ratio per TTL tier, pinned-set size and memory use vs budget."""
+        with self._stats_lock:
+            pending = self._take_stats(time.monotonic())
+        if any(pending):
+            self._flush_stats(*pending)
+
+        r = self._r()
+        raw = r.hgetall(self._key_stats())
+        stats = {
+            (k.decode() if isinstance(k, bytes) else k): int(v)
+            for k, v in raw.items()
+        }
+        tiers = {}
+        for tier in TIERS:
+            hits = stats.get(f"{tier}:hits", 0)
+            misses = stats.get(f"{tier}:misses", 0)
+            total = hits + misses
+            tiers[tier] = {
+                "ttl": self._tier_ttl(tier),
+                "hits": hits,
+                "misses": misses,
+                "hit_ratio": round(hits / total, 4) if total else None,
+            }
+        return {
+            "tiers": tiers,
+            "pinned": r.zcard(self._key_hotset()),
+            "pinned_max": self.pinned_max,
+            "pinned_idle": r.zcount(self._key_hotset(), "-inf", time.time() - self.hot_idle),
+            "used_memory": int(r.info("memory").get("used_memory", 0)),
+            "memory_budget": self.memory_budget,
+        }
+
+    def _parse(self, val) -> Optional[CachedLink]:
         if val is None:
             return None
         if isinstance(val, (bytes, bytearray)):
-            return val.decode(self.encoding, errors="strict")
-        return str(val)
+            return self._unpack(val.decode(self.encoding, errors="strict"))
+        return self._unpack(str(val))
+
+    def get_cached_link(self, code: str) -> Optional[CachedLink]:
+        key = self._key_url(code)
+        return self._parse(self.breaker.call(lambda: self._r().get(key)))
+
+    def lookup_keys(self, code: str) -> list[str]:
+        """Keys read by the redirect path, in the order parse_lookup expects."""
+        return [self._key_tomb(code), self._key_url(code)]
+
+    def parse_lookup(self, values) -> tuple[bool, Optional[CachedLink]]:
+        tomb, val = values or (None, None)
+        return bool(tomb), self._parse(val)
+
+    def lookup(self, code: str) -> tuple[bool, Optional[CachedLink]]:
+        """(tombstoned, entry) in a single round trip."""
+        keys = self.lookup_keys(code)
+        return self.parse_lookup(self.breaker.call(lambda: self._r().mget(keys)))
+
+    def get_cached_url(self, code: str) -> Optional[str]:
+        entry = self.get_cached_link(code)
+        return entry.url if entry else None
 
     def mark_expired(self, code: str) -> None:
-        r = self._r()
         key = self._key_tomb(code)
         ttl = max(1, self.tombstone_ttl)
-        r.set(key, 1, ex=ttl)
+        self.breaker.call(lambda: self._r().set(key, 1, ex=ttl))
 
     def is_tombstoned(self, code: str) -> bool:
-        r = self._r()
         key = self._key_tomb(code)
-        return bool(r.get(key))
+        return bool(self.breaker.call(lambda: self._r().get(key)))
 
     def uncache_url(self, code: str) -> None:
-        r = self._r()
-        try:
-            r.delete(self._key_url(code))
-        except RedisError:
-            pass
+        self.uncache_urls([code])
+
+    def uncache_urls(self, codes) -> None:
+        """Drop cached URLs (and hot-set entries) in one round trip; tombstones stay."""
+        codes = list(codes)
+        if not codes:
+            return
+
+        def drop():
+            pipe = self._r().pipeline(transaction=False)
+            pipe.delete(*(self._key_url(code) for code in codes))
+            pipe.zrem(self._key_hotset(), *codes)
+            pipe.execute()
+
+        self.breaker.call(drop)
+
+    def invalidate(self, code: str) -> None:
+        """Drop both the cached URL and any tombstone (e.g. after an edit)."""
+        keys = (self._key_url(code), self._key_tomb(code))
+
+        def drop():
+            pipe = self._r().pipeline(transaction=False)
+            pipe.delete(*keys)
+            pipe.zrem(self._key_hotset(), code)
+            pipe.execute()
+
+        self.breaker.call(drop)
 
 
 _default_link_cache = LinkCache()
 
 cache_url = _default_link_cache.cache_url
 get_cached_url = _default_link_cache.get_cached_url
+get_cached_link = _default_link_cache.get_cached_link
+lookup_keys = _default_link_cache.lookup_keys
+parse_lookup = _default_link_cache.parse_lookup
+lookup = _default_link_cache.lookup
 mark_expired = _default_link_cache.mark_expired
 is_tombstoned = _default_link_cache.is_tombstoned
 uncache_url = _default_link_cache.uncache_url
+uncache_urls = _default_link_cache.uncache_urls
+invalidate = _default_link_cache.invalidate
+maybe_promote = _default_link_cache.maybe_promote
+record_lookup = _default_link_cache.record_lookup
+enforce_memory_budget = _default_link_cache.enforce_memory_budget
+tier_report = _default_link_cache.tier_report
+idle_pinned = _default_link_cache.idle_pinned
+retier = _default_link_cache.retier
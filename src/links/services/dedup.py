@@ -0,0 +1,137 @@
+import hashlib
+import time
+from typing import Optional
+from urllib.parse import urlsplit, urlunsplit
+from django.conf import settings
+from django_redis import get_redis_connection
+from config.breaker import get_breaker
+
+
+REDIS_KEY_NAMESPACE = "link:dedup"
+
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def normalize_url(url: str) -> str:
+    """Lower-case scheme/host and drop the default port; path, query and fragment are kept as-is."""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if ":" in host:
+        host = f"[{host}]"  # IPv6 literal
+    try:
+        port = parts.port
+    except ValueError:
+        port = None
+    netloc = host
+    if parts.username or parts.password:
+        userinfo = parts.username or ""
+        if parts.password:
+            userinfo += f":{parts.password}"
+        netloc = f"{userinfo}@{netloc}"
+    if port and port != _DEFAULT_PORTS.get(scheme):
+        netloc += f":{port}"
+    return urlunsplit((scheme, netloc, parts.path or "/", parts.query, parts.fragment))
+
+
+def url_hash(url: str) -> str:
+    """Fixed-size (64 hex chars) digest of the normalized URL."""
+    return hashlib.sha256(normalize_url(url).encode()).hexdigest()
+
+
+class LinkDedupIndex:
+    """
+    Redis map of (owner, url hash, expiry, redirect type) -> code.
+
+    Sits in front of the indexed `Link.url_hash` lookup so repeat shortening of
+    the same URL is answered without a DB query.
+    """
+
+    def __init__(
+        self,
+        *,
+        alias: str = "default",
+        prefix: str = REDIS_KEY_NAMESPACE,
+        ttl: Optional[int] = None,
+    ) -> None:
+        self._alias = alias
+        self.prefix = prefix
+        self.ttl = int(
+            getattr(settings, "LINK_DEDUP_TTL", getattr(settings, "CACHE_DEFAULT_TTL", 86400))
+            if ttl is None
+            else ttl
+        )
+
+    # ---- internal helpers ----
+    def _r(self):
+        return get_redis_connection(self._alias)
+
+    @property
+    def breaker(self):
+        return get_breaker(self._alias)
+
+    def _key(
+        self,
+        owner_id: Optional[int],
+        digest: str,
+        expire_at_ts: Optional[int],
+        redirect_type: str,
+    ) -> str:
+        owner = "anon" if owner_id is None else owner_id
+        expiry = "" if expire_at_ts is None else int(expire_at_ts)
+        return f"{self.prefix}:{owner}:{digest}:{expiry}:{redirect_type}"
+
+    # ---- public ----
+    def get_code(
+        self,
+        owner_id: Optional[int],
+        digest: str,
+        expire_at_ts: Optional[int],
+        redirect_type: str,
+    ) -> Optional[str]:
+        key = self._key(owner_id, digest, expire_at_ts, redirect_type)
+        val = self.breaker.call(lambda: self._r().get(key))
+        if val is None:
+            return None
+        if isinstance(val, (bytes, bytearray)):
+            return val.decode()
+        return str(val)
+
+    def remember(
+        self,
+        owner_id: Optional[int],
+        digest: str,
+        expire_at_ts: Optional[int],
+        redirect_type: str,
+        code: str,
+    ) -> None:
+        key = self._key(owner_id, digest, expire_at_ts, redirect_type)
+        ttl = self.ttl
+        if expire_at_ts is not None:
+            ttl = min(ttl, int(expire_at_ts) - int(time.time()))
+        if ttl <= 0:
+            return
+        self.breaker.call(lambda: self._r().set(key, code, ex=ttl))
+
+    def forget(
+        self,
+        owner_id: Optional[int],
+        digest: str,
+        expire_at_ts: Optional[int],
+        redirect_type: str,
+    ) -> None:
+        self.forget_many([(owner_id, digest, expire_at_ts, redirect_type)])
+
+    def forget_many(self, dedup_keys) -> None:
+        """Drop several (owner, digest, expiry, redirect type) entries in one call."""
+        keys = [self._key(*k) for k in dedup_keys]
+        if keys:
+            self.breaker.call(lambda: self._r().delete(*keys))
+
+
+_default_dedup_index = LinkDedupIndex()
+
+get_code = _default_dedup_index.get_code
+remember = _default_dedup_index.remember
+forget = _default_dedup_index.forget
+forget_many = _default_dedup_index.forget_many
@@ -0,0 +1,75 @@
+import logging
+import re
+from functools import lru_cache
+from typing import Optional
+from urllib.parse import urlsplit
+
+from django.conf import settings
+
+
+logger = logging.getLogger(__name__)
+
+DIRECT = "(direct)"
+UNKNOWN = "(unknown)"
+
+_BOT_RE = re.compile(r"bot|crawl|spider|slurp|preview|facebookexternalhit|curl|wget|python-requests|httpclient", re.I)
+_TABLET_RE = re.compile(r"ipad|tablet|kindle|silk|playbook|(android(?!.*mobile))", re.I)
+_MOBILE_RE = re.compile(r"mobi|iphone|ipod|android|blackberry|opera mini|iemobile|windows phone", re.I)
+_DESKTOP_RE = re.compile(r"windows nt|macintosh|x11|linux|cros", re.I)
+
+
+def referrer_host(referrer: Optional[str]) -> str:
+    """Host of the referring page ("www." stripped), or "(direct)"."""
+    if not referrer:
+        return DIRECT
+    try:
+        host = (urlsplit(referrer).hostname or "").lower()
+    except ValueError:
+        return UNKNOWN
+    if host.startswith("www."):
+        host = host[4:]
+    return host or UNKNOWN
+
+
+@lru_cache(maxsize=4096)
+def classify_user_agent(ua: Optional[str]) -> str:
+    """bot / tablet / mobile / desktop / (unknown). Memoized: UA strings repeat heavily."""
+    if not ua:
+        return UNKNOWN
+    if _BOT_RE.search(ua):
+        return "bot"
+    if _TABLET_RE.search(ua):
+        return "tablet"
+    if _MOBILE_RE.search(ua):
+        return "mobile"
+    if _DESKTOP_RE.search(ua):
+        return "desktop"
+    return UNKNOWN
+
+
+@lru_cache(maxsize=1)
+def _geoip_reader():
+    # a missing package or unreadable file is reported at startup (links.E001/E002)
+    path = getattr(settings, "GEOIP_COUNTRY_DB", "")
+    if not path:
+        return None
+    try:
+        import maxminddb
+
+        return maxminddb.open_database(path)
+    except (ImportError, OSError, ValueError, RuntimeError):
+        logger.exception("could not open GeoIP database %s; countries are disabled", path)
+        return None
+
+
+@lru_cache(maxsize=16384)
+def country_for_ip(ip: Optional[str]) -> str:
+    """ISO country code from the offline GeoIP file, or "(unknown)"."""
+    reader = _geoip_reader()
+    if reader is None or not ip:
+        return UNKNOWN
+    try:
+        record = reader.get(ip)
+    except ValueError:
+        return UNKNOWN
+    return ((record or {}).get("country") or {}).get("iso_code") or UNKNOWN
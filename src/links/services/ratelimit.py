@@ -0,0 +1,164 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple, Optional, Sequence
+from django.conf import settings
+from django_redis import get_redis_connection
+from config.breaker import get_breaker
+
+
+REDIS_KEY_NAMESPACE = "rl"
+
+# Token bucket: refill, take `cost` tokens if available, persist, and GET any
+# extra KEYS so callers can piggyback reads on the same round trip.
+# Uses the server clock so every web node sees the same time.
+TOKEN_BUCKET_LUA = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+local retry_after = 0
+if tokens >= cost then
+  tokens = tokens - cost
+  allowed = 1
+else
+  retry_after = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+local res = {allowed, tostring(retry_after), tostring(tokens)}
+for i = 2, #KEYS do
+  res[#res + 1] = redis.call('GET', KEYS[i])
+end
+return res
+"""
+
+
+class RateLimitPolicy(NamedTuple):
+    rate: float      # tokens per second
+    capacity: int    # burst size
+
+
+class RateLimitDecision(NamedTuple):
+    allowed: bool
+    retry_after: float  # seconds until `cost` tokens are available (0 when allowed)
+    remaining: int
+
+
+class RateLimiter:
+    """
+    Redis token-bucket rate limiter (one EVALSHA per check).
+
+    Denied identities are also remembered in-process until their retry-after,
+    so obviously over-limit clients are rejected without a Redis call. Redis
+    failures fail open (through the circuit breaker).
+    """
+
+    def __init__(
+        self,
+        *,
+        alias: str = "default",
+        prefix: str = REDIS_KEY_NAMESPACE,
+        local_max_size: int = 10000,
+    ) -> None:
+        self._alias = alias
+        self.prefix = prefix
+        self.local_max_size = local_max_size
+        self._blocked: "OrderedDict[str, float]" = OrderedDict()  # key -> monotonic unblock time
+        self._lock = threading.Lock()
+        self._script = None
+
+    # ---- internal helpers ----
+    def _r(self):
+        return get_redis_connection(self._alias)
+
+    @property
+    def breaker(self):
+        return get_breaker(self._alias)
+
+    def _key(self, scope: str, identity: str) -> str:
+        return f"{self.prefix}:{scope}:{identity}"
+
+    def _bucket_script(self):
+        if self._script is None:
+            self._script = self._r().register_script(TOKEN_BUCKET_LUA)
+        return self._script
+
+    def _locally_blocked(self, key: str, now: float) -> float:
+        with self._lock:
+            until = self._blocked.get(key)
+            if until is None:
+                return 0.0
+            if until <= now:
+                del self._blocked[key]
+                return 0.0
+            return until - now
+
+    def _block_locally(self, key: str, until: float) -> None:
+        with self._lock:
+            self._blocked[key] = until
+            self._blocked.move_to_end(key)
+            while len(self._blocked) > self.local_max_size:
+                self._blocked.popitem(last=False)
+
+    # ---- public ----
+    @staticmethod
+    def get_policy(scope: str) -> Optional[RateLimitPolicy]:
+        if not getattr(settings, "RATE_LIMIT_ENABLED", True):
+            return None
+        conf = getattr(settings, "RATE_LIMITS", {}).get(scope)
+        if not conf:
+            return None
+        return RateLimitPolicy(float(conf["rate"]), int(conf["capacity"]))
+
+    def hit(
+        self,
+        scope: str,
+        identity: str,
+        *,
+        cost: int = 1,
+        read_keys: Sequence[str] = (),
+    ) -> tuple[RateLimitDecision, Optional[list]]:
+        """
+        Take `cost` tokens from the (scope, identity) bucket.
+
+        Values of `read_keys` are fetched in the same round trip and returned
+        alongside the decision; they are None when Redis wasn't consulted.
+        """
+        policy = self.get_policy(scope)
+        if policy is None:
+            return RateLimitDecision(True, 0.0, 0), None
+
+        key = self._key(scope, identity)
+        now = time.monotonic()
+        wait = self._locally_blocked(key, now)
+        if wait:
+            return RateLimitDecision(False, wait, 0), None
+
+        res = self.breaker.call(
+            lambda: self._bucket_script()(
+                keys=[key, *read_keys],
+                args=[policy.rate, policy.capacity, cost],
+            )
+        )
+        if res is None:
+            # Redis unavailable: fail open
+            return RateLimitDecision(True, 0.0, 0), None
+
+        allowed, retry_after, remaining = bool(int(res[0])), float(res[1]), float(res[2])
+        if not allowed:
+            self._block_locally(key, now + retry_after)
+        return RateLimitDecision(allowed, retry_after, int(math.floor(remaining))), list(res[3:])
+
+
+_default_rate_limiter = RateLimiter()
+
+hit = _default_rate_limiter.hit
+get_policy = _default_rate_limiter.get_policy
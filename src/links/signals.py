@@ -0,0 +1,36 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Link
+from .services import cache as _cache
+from .services import dedup as _dedup
+
+
+@receiver(post_save, sender=Link, dispatch_uid="links.invalidate_on_update")
+def invalidate_on_update(sender, instance: Link, created: bool, update_fields=None, **kwargs):
+    # Creation (including the follow-up save that assigns the code) is
+    # handled by Link.save's write-through; just remember the stored dedup
+    # identity so a later edit of this same instance can drop it.
+    if created or not instance.code or update_fields == frozenset({"code"}):
+        instance._loaded_dedup_key = instance.dedup_key
+        return
+    code = instance.code
+    transaction.on_commit(lambda: _cache.invalidate(code))
+
+    # URL/owner/expiry/type changed: the old dedup entry must no longer point here
+    old_key = getattr(instance, "_loaded_dedup_key", None)
+    if old_key is not None and old_key != instance.dedup_key:
+        transaction.on_commit(lambda: _dedup.forget(*old_key))
+    instance._loaded_dedup_key = instance.dedup_key
+
+
+@receiver(post_delete, sender=Link, dispatch_uid="links.invalidate_on_delete")
+def invalidate_on_delete(sender, instance: Link, **kwargs):
+    if not instance.code:
+        return
+    code = instance.code
+    dedup_key = instance.dedup_key
+    # Keep the tombstone: a purged expired code should stay a cached 410.
+    transaction.on_commit(lambda: _cache.uncache_url(code))
+    transaction.on_commit(lambda: _dedup.forget(*dedup_key))
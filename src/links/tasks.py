@@ -3,6 +3,9 @@ from django.db import transaction
 from django.utils import timezone
 
 from .models import Link
+from .services import cache as _cache
+from .services.analytics import LinkAnalytics
+from .services import dedup as _dedup
 
 
 @shared_task(bind=True, max_retries=3, default_retry_delay=10)
@@ -15,23 +18,59 @@ def purge_expired_links(self, batch_size: int = 1000) -> dict:
     total_deleted = 0
 
     while True:
-        # Pull a batch of expired rows (IDs only to keep memory low)
-        expired_ids = list(
+        # Pull a batch of expired rows (only what the Redis cleanup needs)
+        rows = list(
             Link.objects
             .filter(expire_at__isnull=False, expire_at__lte=now)
-            .values_list("id", flat=True)[:batch_size]
+            .values_list("id", "code", "created_by_id", "url_hash", "expire_at", "redirect_type")
+            [:batch_size]
         )
-        if not expired_ids:
+        if not rows:
             break
 
+        # Raw delete: the post_delete receiver would otherwise force Django to
+        # load and delete row by row; Redis is cleaned up per batch below.
         with transaction.atomic():
-            deleted, _ = Link.objects.filter(id__in=expired_ids).delete()
+            deleted = Link.objects.filter(id__in=[row[0] for row in rows])._raw_delete(Link.objects.db)
 
-        total_processed += len(expired_ids)
+        _cache.uncache_urls(row[1] for row in rows)
+        _dedup.forget_many(
+            (owner_id, digest, int(expire_at.timestamp()), redirect_type)
+            for _, _, owner_id, digest, expire_at, redirect_type in rows
+        )
+
+        total_processed += len(rows)
         total_deleted += deleted
 
         # If fewer than batch_size found, we're done
-        if len(expired_ids) < batch_size:
+        if len(rows) < batch_size:
             break
 
     return {"processed": total_processed, "deleted": total_deleted}
+
+
+@shared_task(ignore_result=True)
+def warm_link_cache(
+    code: str,
+    url: str,
+    expire_at_ts: int | None,
+    permanent: bool = False,
+    recent_visits: int | None = 0,
+) -> None:
+    """
+    Populate the redirect cache for a freshly created link.
+    """
+    _cache.cache_url(code, url, expire_at_ts, permanent, recent_visits)
+
+
+@shared_task(ignore_result=True)
+def rebalance_link_cache(batch_size: int = 1000) -> dict:
+    """
+    Re-tier pinned links that haven't been hit for CACHE_HOT_IDLE seconds, then
+    demote part of the pinned set while Redis is over CACHE_MEMORY_BUDGET.
+    """
+    codes = _cache.idle_pinned(batch_size)
+    # codes whose counters can't be read (Redis down) are simply checked next run
+    result = _cache.retier(LinkAnalytics.get_recent_visits_many(codes))
+    result["memory"] = _cache.enforce_memory_budget()
+    return result
@@ -1,3 +1,728 @@
-from django.test import TestCase
+import tempfile
+import time
+from datetime import timedelta
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from django_redis.exceptions import ConnectionInterrupted
+from rest_framework.test import APIRequestFactory
+from redis.exceptions import BusyLoadingError, ConnectionError, OutOfMemoryError, ResponseError, TimeoutError
+
+from config.breaker import CircuitBreaker
+
+from . import profiling
+from .checks import geoip_database_check
+from .helpers import get_client_ip
+from .middleware import RequestProfilerMiddleware
+from .models import Link
+from .serializers import LINK_LIST_FIELDS, LinkCreateSerializer, LinkListSerializer, serialize_link_rows
+from .services.analytics import LinkAnalytics
+from .services.base62 import Base62
+from .services.dedup import normalize_url, url_hash
+from .services.cache import COLD, HOT, WARM, CachedLink, LinkCache
+from .tasks import purge_expired_links
+from .views import AnalyticsAPIView, RedirectView
+
+
+class CircuitBreakerTests(SimpleTestCase):
+    def setUp(self):
+        self.now = 1000.0
+        patcher = mock.patch("config.breaker.time.monotonic", side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.breaker = CircuitBreaker(
+            "test", failure_rate=0.5, min_calls=4, window=30, reset_timeout=5
+        )
+
+    def _fail(self):
+        def boom():
+            raise ConnectionError("down")
+
+        return self.breaker.call(boom, fallback="fallback")
+
+    def _trip(self):
+        for _ in range(4):
+            self._fail()
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+
+    def test_stays_closed_below_min_calls(self):
+        for _ in range(3):
+            self._fail()
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_stays_closed_below_failure_rate(self):
+        for _ in range(3):
+            self.breaker.call(lambda: "ok")
+        self._fail()
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_trips_at_failure_rate(self):
+        self.breaker.call(lambda: "ok")
+        self.breaker.call(lambda: "ok")
+        self._fail()
+        self._fail()
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        self.assertEqual(self.breaker.snapshot()["trips"], 1)
+
+    def test_old_failures_leave_the_window(self):
+        for _ in range(3):
+            self._fail()
+        self.now += 31
+        self._fail()
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_short_circuits_while_open(self):
+        self._trip()
+        fn = mock.Mock(return_value="ok")
+        self.assertEqual(self.breaker.call(fn, fallback="fallback"), "fallback")
+        fn.assert_not_called()
+        self.assertEqual(self.breaker.snapshot()["short_circuited"], 1)
+
+    def test_half_open_probe_success_closes(self):
+        self._trip()
+        self.now += 5
+        self.assertEqual(self.breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertEqual(self.breaker.call(lambda: "ok"), "ok")
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_half_open_probe_failure_reopens(self):
+        self._trip()
+        self.now += 5
+        self.assertEqual(self._fail(), "fallback")
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        self.assertEqual(self.breaker.snapshot()["trips"], 2)
+
+    def test_half_open_allows_a_single_probe(self):
+        self._trip()
+        self.now += 5
+        probe = self.breaker.allow()
+        self.assertIsNotNone(probe)
+        self.assertIsNone(self.breaker.allow())
+        self.breaker.record_success(probe)
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_timeouts_and_loading_count_as_failures(self):
+        for exc in (TimeoutError, BusyLoadingError, TimeoutError, BusyLoadingError):
+            self.breaker.call(mock.Mock(side_effect=exc("down")))
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+
+    def test_error_replies_do_not_trip(self):
+        for exc in (OutOfMemoryError("OOM"), ResponseError("WRONGTYPE"), ResponseError("ERR script")) * 3:
+            self.assertEqual(self.breaker.call(mock.Mock(side_effect=exc), fallback="fallback"), "fallback")
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+        self.assertEqual(self.breaker.snapshot()["window_failures"], 0)
+
+    def test_error_reply_to_half_open_probe_closes(self):
+        self._trip()
+        self.now += 5
+        self.breaker.call(mock.Mock(side_effect=OutOfMemoryError("OOM")))
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_straggler_does_not_decide_half_open(self):
+        straggler = self.breaker.allow()  # admitted while closed
+        self._trip()
+        self.now += 5
+        probe = self.breaker.allow()
+
+        self.breaker.record_success(straggler)
+        self.assertEqual(self.breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertIsNone(self.breaker.allow())  # probe still in flight
+
+        self.breaker.record_failure(probe)
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+
+
+class Base62Tests(SimpleTestCase):
+    def setUp(self):
+        self.b62 = Base62()
+
+    def test_valid_codes(self):
+        for code in ("0", "1", "z", "Z", "10", "abc", self.b62.encode(10**12)):
+            self.assertTrue(self.b62.is_valid(code), code)
+
+    def test_leading_zero_is_not_canonical(self):
+        self.assertFalse(self.b62.is_valid("01"))
+        self.assertFalse(self.b62.is_valid("00"))
+
+    def test_over_length(self):
+        self.assertFalse(self.b62.is_valid("1" * (self.b62.max_length + 1)))
+
+    def test_max_code_boundary(self):
+        self.assertTrue(self.b62.is_valid(self.b62.max_code))
+        self.assertFalse(self.b62.is_valid(self.b62.encode(self.b62.max_value + 1)))
+        self.assertEqual(len(self.b62.encode(self.b62.max_value + 1)), self.b62.max_length)
+
+    def test_characters_outside_alphabet(self):
+        for code in ("ab-c", "abc!", "a b", "ab_c", "é"):
+            self.assertFalse(self.b62.is_valid(code), code)
+
+    def test_trailing_newline(self):
+        self.assertFalse(self.b62.is_valid("abc\n"))
+
+    def test_empty_and_non_str(self):
+        self.assertFalse(self.b62.is_valid(""))
+        self.assertFalse(self.b62.is_valid(None))
+        self.assertFalse(self.b62.is_valid(123))
+
+    def test_batch_codec_matches_scalar(self):
+        nums = [0, 1, 61, 62, 3843, 3844, 10**9, self.b62.max_value]
+        codes = self.b62.encode_many(nums)
+        self.assertEqual(codes, [self.b62.encode(n) for n in nums])
+        self.assertEqual(self.b62.decode_many(codes), nums)
+
+
+class ClientIPTests(SimpleTestCase):
+    def _ip(self, xff=None):
+        extra = {"HTTP_X_FORWARDED_FOR": xff} if xff is not None else {}
+        return get_client_ip(RequestFactory().get("/", REMOTE_ADDR="10.0.0.1", **extra))
+
+    def test_ignores_forwarded_for_without_trusted_proxies(self):
+        self.assertEqual(self._ip("1.2.3.4"), "10.0.0.1")
+
+    @override_settings(TRUSTED_PROXY_COUNT=1)
+    def test_uses_entry_added_by_trusted_proxy(self):
+        self.assertEqual(self._ip("6.6.6.6, 1.2.3.4"), "1.2.3.4")
+        self.assertEqual(self._ip("1.2.3.4"), "1.2.3.4")
+
+    @override_settings(TRUSTED_PROXY_COUNT=2)
+    def test_multiple_trusted_proxies(self):
+        self.assertEqual(self._ip("6.6.6.6, 1.2.3.4, 172.16.0.2"), "1.2.3.4")
+
+    @override_settings(TRUSTED_PROXY_COUNT=1)
+    def test_falls_back_to_remote_addr(self):
+        self.assertEqual(self._ip(), "10.0.0.1")
+        self.assertEqual(self._ip(" , "), "10.0.0.1")
+
+
+class GeoIPCheckTests(SimpleTestCase):
+    @override_settings(GEOIP_COUNTRY_DB="")
+    def test_unset_is_fine(self):
+        self.assertEqual(geoip_database_check(None), [])
+
+    @override_settings(GEOIP_COUNTRY_DB="/nonexistent/GeoLite2-Country.mmdb")
+    def test_unreadable_database_fails(self):
+        self.assertEqual([e.id for e in geoip_database_check(None)], ["links.E002"])
+
+    @override_settings(GEOIP_COUNTRY_DB="/nonexistent/GeoLite2-Country.mmdb")
+    def test_missing_package_fails(self):
+        with mock.patch.dict("sys.modules", {"maxminddb": None}):
+            self.assertEqual([e.id for e in geoip_database_check(None)], ["links.E001"])
+
+
+class LinkCacheTierTests(SimpleTestCase):
+    @override_settings(CACHE_HOT_MIN_VISITS=100, CACHE_WARM_MIN_VISITS=2)
+    def test_pick_tier(self):
+        cache = LinkCache()
+        self.assertEqual(cache.pick_tier(0), COLD)  # new links start cold
+        self.assertEqual(cache.pick_tier(1), COLD)
+        self.assertEqual(cache.pick_tier(2), WARM)
+        self.assertEqual(cache.pick_tier(99), WARM)
+        self.assertEqual(cache.pick_tier(100), HOT)
+        self.assertEqual(cache.pick_tier(None), WARM)  # counters unavailable
+
+    def test_pack_round_trip(self):
+        for entry in (
+            CachedLink("https://example.com/a|b", None, True, HOT),
+            CachedLink("https://example.com/", 1700000000, False, COLD),
+        ):
+            packed = LinkCache._pack(entry.url, entry.expire_at_ts, entry.permanent, entry.tier)
+            self.assertEqual(LinkCache._unpack(packed), entry)
+
+    def test_unpack_legacy_values(self):
+        self.assertEqual(LinkCache._unpack("p||https://example.com/"), CachedLink("https://example.com/", None, True, WARM))
+        self.assertEqual(LinkCache._unpack("https://example.com/"), CachedLink("https://example.com/", None, False, WARM))
+
+
+class AnalyticsDegradationTests(SimpleTestCase):
+    """Report reads go through the breaker: Redis down -> empty report, not a 500."""
+
+    def setUp(self):
+        breaker = CircuitBreaker("test")
+        patchers = [
+            mock.patch("links.services.analytics.get_breaker", return_value=breaker),
+            mock.patch.object(LinkAnalytics, "_r", side_effect=ConnectionError("down")),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_counts(self):
+        self.assertEqual(LinkAnalytics.get_counts("abc"), {"visits": 0, "unique_visitors": 0})
+
+    def test_dimensions(self):
+        self.assertEqual(
+            LinkAnalytics.get_dimensions("abc"),
+            {"referrers": [], "devices": [], "countries": []},
+        )
+
+    def test_daily(self):
+        daily = LinkAnalytics.get_daily("abc", days=3)
+        self.assertEqual([row["visits"] for row in daily], [0, 0, 0])
+        self.assertEqual(daily, sorted(daily, key=lambda row: row["date"]))
+        self.assertEqual(LinkAnalytics.get_daily("abc", days=0), [])
+
+    def test_recent_visits(self):
+        self.assertIsNone(LinkAnalytics.get_recent_visits("abc"))
+
+
+class WriteThroughTests(TestCase):
+    URL = "https://example.com/write-through"
+
+    def test_cached_only_after_commit(self):
+        with mock.patch("links.services.cache.cache_url") as cache_url:
+            with self.captureOnCommitCallbacks(execute=True):
+                link = Link.objects.create(original_url=self.URL)
+                cache_url.assert_not_called()
+        # new links start in the cold tier (0 recent visits)
+        cache_url.assert_called_once_with(link.code, self.URL, None, False, 0)
+
+    @override_settings(LINK_CACHE_WRITE_THROUGH_ASYNC=True)
+    def test_async_path_uses_task(self):
+        with (
+            mock.patch("links.tasks.warm_link_cache.delay") as delay,
+            mock.patch("links.services.cache.cache_url") as cache_url,
+        ):
+            with self.captureOnCommitCallbacks(execute=True):
+                link = Link.objects.create(original_url=self.URL)
+                delay.assert_not_called()
+        delay.assert_called_once_with(link.code, self.URL, None, False, 0)
+        cache_url.assert_not_called()
+
+    @override_settings(LINK_CACHE_WRITE_THROUGH=False)
+    def test_disabled(self):
+        with mock.patch("links.services.cache.cache_url") as cache_url:
+            with self.captureOnCommitCallbacks(execute=True):
+                Link.objects.create(original_url=self.URL)
+        cache_url.assert_not_called()
+
+
+class LinkInvalidationTests(TestCase):
+    def setUp(self):
+        patchers = {
+            name: mock.patch(f"links.services.{name}")
+            for name in (
+                "cache.cache_url",
+                "cache.invalidate",
+                "cache.uncache_url",
+                "cache.uncache_urls",
+                "dedup.forget",
+                "dedup.forget_many",
+            )
+        }
+        self.mocks = {}
+        for name, patcher in patchers.items():
+            self.mocks[name] = patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _create(self, url="https://example.com/a", **kwargs):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Link.objects.create(original_url=url, **kwargs)
+
+    def test_edit_invalidates_url_and_tombstone(self):
+        link = Link.objects.get(pk=self._create().pk)
+        old_key = link.dedup_key
+        link.original_url = "https://example.com/b"
+        with self.captureOnCommitCallbacks(execute=True):
+            link.save()
+        self.mocks["cache.invalidate"].assert_called_once_with(link.code)
+        self.mocks["dedup.forget"].assert_called_once_with(*old_key)
+
+    def test_delete_keeps_tombstone(self):
+        link = self._create()
+        code, dedup_key = link.code, link.dedup_key
+        with self.captureOnCommitCallbacks(execute=True):
+            link.delete()
+        self.mocks["cache.uncache_url"].assert_called_once_with(code)
+        self.mocks["cache.invalidate"].assert_not_called()
+        self.mocks["dedup.forget"].assert_called_once_with(*dedup_key)
+
+    def test_purge_batches_redis_cleanup_and_keeps_tombstones(self):
+        past = timezone.now() - timedelta(hours=1)
+        expired = [self._create(f"https://example.com/{i}", expire_at=past) for i in range(3)]
+        live = self._create("https://example.com/live", expire_at=timezone.now() + timedelta(days=1))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            result = purge_expired_links(batch_size=2)
+
+        self.assertEqual(result, {"processed": 3, "deleted": 3})
+        self.assertEqual(list(Link.objects.values_list("pk", flat=True)), [live.pk])
+        purged = [list(call.args[0]) for call in self.mocks["cache.uncache_urls"].call_args_list]
+        self.assertEqual(sorted(sum(purged, [])), sorted(link.code for link in expired))
+        self.assertEqual(len(purged), 2)  # one Redis cleanup per batch
+        forgotten = [list(call.args[0]) for call in self.mocks["dedup.forget_many"].call_args_list]
+        self.assertCountEqual(sum(forgotten, []), [link.dedup_key for link in expired])
+        # raw delete: no per-row signal work, tombstones untouched
+        self.mocks["cache.uncache_url"].assert_not_called()
+        self.mocks["cache.invalidate"].assert_not_called()
+
+
+class LinkCacheKeyTests(SimpleTestCase):
+    def setUp(self):
+        self.cache = LinkCache(prefix="link")
+        self.redis = mock.MagicMock()
+        self.pipe = self.redis.pipeline.return_value
+        patchers = [
+            mock.patch.object(LinkCache, "_r", return_value=self.redis),
+            mock.patch.object(LinkCache, "breaker", CircuitBreaker("test")),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_invalidate_drops_url_and_tombstone(self):
+        self.cache.invalidate("abc")
+        self.pipe.delete.assert_called_once_with("link:abc:url", "link:abc:expired")
+        self.pipe.zrem.assert_called_once_with("link:cache:pinned", "abc")
+
+    def test_uncache_keeps_tombstone(self):
+        self.cache.uncache_urls(["abc", "abd"])
+        self.pipe.delete.assert_called_once_with("link:abc:url", "link:abd:url")
+        self.pipe.zrem.assert_called_once_with("link:cache:pinned", "abc", "abd")
+
+
+@override_settings(REDIRECT_CACHE_MAX_AGE=86400, REDIRECT_TEMPORARY_MAX_AGE=60)
+class RedirectResponseTests(SimpleTestCase):
+    URL = "https://example.com/"
+
+    def _build(self, permanent, expire_in=None):
+        expire_at_ts = int(time.time()) + expire_in if expire_in is not None else None
+        return RedirectView._build_redirect(CachedLink(self.URL, expire_at_ts, permanent))
+
+    def test_permanent(self):
+        response = self._build(True)
+        self.assertEqual(response.status_code, 301)
+        self.assertEqual(response["Location"], self.URL)
+        self.assertEqual(response["Cache-Control"], "public, max-age=86400")
+
+    def test_temporary(self):
+        response = self._build(False)
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(response["Cache-Control"], "public, max-age=60")
+
+    def test_max_age_capped_by_expiry(self):
+        with mock.patch("time.time", return_value=1_000_000):
+            response = self._build(True, expire_in=300)
+        self.assertEqual(response["Cache-Control"], "public, max-age=300")
+
+    @override_settings(REDIRECT_TEMPORARY_MAX_AGE=0)
+    def test_no_cache_when_max_age_not_positive(self):
+        self.assertEqual(self._build(False)["Cache-Control"], "private, no-cache")
+        with mock.patch("time.time", return_value=1_000_000):
+            response = self._build(True, expire_in=0)
+        self.assertEqual(response["Cache-Control"], "private, no-cache")
+
+
+@override_settings(
+    ANALYTICS_CACHE_TTL=10,
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+)
+class AnalyticsETagTests(SimpleTestCase):
+    def setUp(self):
+        patchers = [
+            mock.patch.object(LinkAnalytics, "get_counts", return_value={"visits": 3, "unique_visitors": 2}),
+            mock.patch("links.views._get_breaker", return_value=CircuitBreaker("test")),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.view = AnalyticsAPIView.as_view()
+
+    def _get(self, **headers):
+        request = APIRequestFactory().get("/api/links/analytics/abc/", **headers)
+        return self.view(request, code="abc")
+
+    def test_etag_and_304(self):
+        first = self._get()
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.data, {"code": "abc", "visits": 3, "unique_visitors": 2})
+        etag = first["ETag"]
+
+        second = self._get(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(second.status_code, 304)
+        self.assertEqual(second["ETag"], etag)
+        self.assertIn("private", second["Cache-Control"])
+
+        self.assertEqual(self._get(HTTP_IF_NONE_MATCH='"other"').status_code, 200)
+
+    def test_report_cache_outage_still_answers(self):
+        def down(*args, **kwargs):
+            try:
+                raise ConnectionError("down")
+            except ConnectionError as e:
+                raise ConnectionInterrupted(connection=None) from e
+
+        with mock.patch("links.views._django_cache.get", side_effect=down), \
+                mock.patch("links.views._django_cache.set", side_effect=down):
+            response = self._get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["visits"], 3)
+
+    def test_invalid_code_is_404_without_redis(self):
+        request = APIRequestFactory().get("/api/links/analytics/0bad/")
+        self.assertEqual(self.view(request, code="0bad").status_code, 404)
+
+
+class LinkRowSerializerTests(SimpleTestCase):
+    def _links(self):
+        created = timezone.now().replace(microsecond=123456)
+        return [
+            Link(code="abc", original_url="https://example.com/a", created_at=created,
+                 expire_at=created + timedelta(days=1), redirect_type=Link.RedirectType.PERMANENT),
+            Link(code="abd", original_url="https://example.com/b", created_at=created.replace(microsecond=0),
+                 expire_at=None, redirect_type=Link.RedirectType.TEMPORARY),
+        ]
+
+    def _assert_same_output(self):
+        request = APIRequestFactory().get("/api/links/")
+        links = self._links()
+        rows = [tuple(getattr(link, field) for field in LINK_LIST_FIELDS) for link in links]
+        expected = LinkListSerializer(links, many=True, context={"request": request}).data
+        self.assertEqual(serialize_link_rows(rows, request), [dict(item) for item in expected])
+        return expected
+
+    def test_matches_model_serializer(self):
+        self._assert_same_output()
+
+    @override_settings(TIME_ZONE="Asia/Tehran")
+    def test_matches_model_serializer_in_local_time_zone(self):
+        with timezone.override("Asia/Tehran"):
+            expected = self._assert_same_output()
+        self.assertTrue(expected[0]["created_at"].endswith("+03:30"))
+        self.assertIn(".123456", expected[0]["created_at"])
+
+
+class ProfilingTests(SimpleTestCase):
+    def test_span_is_noop_without_profile(self):
+        with profiling.span("work"):
+            pass
+
+    def test_span_records_into_active_profile(self):
+        profile = profiling.RequestProfile("header")
+        ctx = profiling.activate(profile)
+        try:
+            with profiling.span("cache_lookup"):
+                pass
+        finally:
+            profiling.deactivate(ctx)
+        with profiling.span("after"):
+            pass
+        spans = profile.as_dict()["spans"]
+        self.assertEqual([s["name"] for s in spans], ["cache_lookup"])
+        self.assertGreaterEqual(spans[0]["duration_ms"], 0)
+
+    def test_token_round_trip(self):
+        self.assertTrue(profiling.check_token(profiling.make_token()))
+
+    def test_tampered_token_rejected(self):
+        token = profiling.make_token()
+        self.assertFalse(profiling.check_token(token[:-1] + ("a" if token[-1] != "a" else "b")))
+        self.assertFalse(profiling.check_token("profile"))
+
+    @override_settings(PROFILING_TOKEN_MAX_AGE=60)
+    def test_expired_token_rejected(self):
+        token = profiling.make_token()
+        with mock.patch("django.core.signing.time.time", return_value=time.time() + 61):
+            self.assertFalse(profiling.check_token(token))
+
+    @override_settings(PROFILING_SINK="file", PROFILING_FILES_MAX=2)
+    def test_file_sink_keeps_newest_files(self):
+        with tempfile.TemporaryDirectory() as directory, override_settings(PROFILING_DIR=directory):
+            for ts in (1000.0, 1001.0, 1002.0):
+                profiling.write_record({"ts": ts})
+            names = sorted(path.name for path in Path(directory).iterdir())
+        self.assertEqual(len(names), 2)
+        self.assertTrue(names[0].startswith("1001000-"))
+
+
+@override_settings(PROFILING_ENABLED=True, PROFILING_SAMPLE_RATE=0.0, PROFILING_SLOW_MS=0,
+                   PROFILING_SLOW_INTERVAL=10, PROFILING_STACKS=False)
+class RequestProfilerMiddlewareTests(SimpleTestCase):
+    def setUp(self):
+        self.now = 1000.0
+        patcher = mock.patch("links.middleware.time.monotonic", side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        write = mock.patch("links.profiling.write_record")
+        self.write = write.start()
+        self.addCleanup(write.stop)
+
+        def view(request):
+            with profiling.span("work"):
+                return HttpResponse("ok")
+
+        self.middleware = RequestProfilerMiddleware(view)
+
+    def _get(self, **headers):
+        return self.middleware(RequestFactory().get("/abc", headers=headers))
+
+    def test_slow_request_is_captured(self):
+        self.assertEqual(self._get().status_code, 200)
+        record = self.write.call_args.args[0]
+        self.assertEqual((record["reason"], record["path"], record["status"]), ("slow", "/abc", 200))
+        self.assertEqual([s["name"] for s in record["spans"]], ["work"])
+
+    def test_slow_captures_are_rate_limited(self):
+        self._get()
+        self._get()
+        self.assertEqual(self.write.call_count, 1)
+        self.now += 10
+        self._get()
+        self.assertEqual(self.write.call_count, 2)
+
+    def test_header_requests_bypass_the_slow_limit(self):
+        self._get()
+        self._get(**{"X-Profile-Token": profiling.make_token()})
+        self.assertEqual([c.args[0]["reason"] for c in self.write.call_args_list], ["slow", "header"])
+
+    @override_settings(PROFILING_SLOW_MS=60_000)
+    def test_fast_request_not_captured(self):
+        RequestProfilerMiddleware(lambda request: HttpResponse("ok"))(RequestFactory().get("/abc"))
+        self.write.assert_not_called()
+
+
+class NormalizeURLTests(SimpleTestCase):
+    def test_scheme_and_host_case(self):
+        self.assertEqual(normalize_url("HTTPS://Example.COM/Path"), "https://example.com/Path")
+
+    def test_default_ports(self):
+        self.assertEqual(normalize_url("http://example.com:80/a"), "http://example.com/a")
+        self.assertEqual(normalize_url("https://example.com:443/a"), "https://example.com/a")
+        self.assertEqual(normalize_url("https://example.com:80/a"), "https://example.com:80/a")
+        self.assertEqual(normalize_url("http://example.com:8080/a"), "http://example.com:8080/a")
+
+    def test_ipv6(self):
+        self.assertEqual(normalize_url("http://[2001:DB8::1]:80/x"), "http://[2001:db8::1]/x")
+        self.assertEqual(normalize_url("http://[::1]:8000/x"), "http://[::1]:8000/x")
+
+    def test_userinfo_kept_verbatim(self):
+        self.assertEqual(normalize_url("https://User:Pw@Example.com/"), "https://User:Pw@example.com/")
+        self.assertEqual(normalize_url("https://user@example.com:443"), "https://user@example.com/")
+
+    def test_empty_path_query_and_fragment(self):
+        self.assertEqual(normalize_url("https://example.com"), "https://example.com/")
+        self.assertEqual(normalize_url("https://example.com?b=1&a=2#Frag"), "https://example.com/?b=1&a=2#Frag")
+
+    def test_hash_uses_normalized_form(self):
+        self.assertEqual(url_hash("HTTPS://Example.com:443"), url_hash("https://example.com/"))
+        self.assertNotEqual(url_hash("https://example.com/a"), url_hash("https://example.com/A"))
+
+
+@override_settings(LINK_DEDUP_ENABLED=True)
+class DeduplicationTests(TestCase):
+    URL = "https://example.com/dedup"
+
+    def setUp(self):
+        patchers = {
+            name: mock.patch(f"links.services.{name}")
+            for name in (
+                "dedup.get_code",
+                "dedup.remember",
+                "dedup.forget",
+                "cache.get_cached_link",
+                "cache.cache_url",
+                "cache.invalidate",
+                "cache.uncache_url",
+            )
+        }
+        self.mocks = {}
+        for name, patcher in patchers.items():
+            self.mocks[name] = patcher.start()
+            self.addCleanup(patcher.stop)
+        self.mocks["dedup.get_code"].return_value = None
+        self.mocks["cache.get_cached_link"].return_value = None
+        users = get_user_model().objects
+        with mock.patch("accounts.signals.invalidate_user"):
+            self.alice = users.create_user(email="alice@example.com")
+            self.bob = users.create_user(email="bob@example.com")
+
+    def _shorten(self, user=None, url=URL, **data):
+        request = RequestFactory().post("/api/links/create/")
+        request.user = user or AnonymousUser()
+        serializer = LinkCreateSerializer(data={"original_url": url, **data}, context={"request": request})
+        serializer.is_valid(raise_exception=True)
+        with self.captureOnCommitCallbacks(execute=True):
+            return serializer.save()
+
+    def test_same_owner_same_url_reuses_code(self):
+        first = self._shorten(self.alice)
+        self.assertEqual(self._shorten(self.alice, url="HTTPS://Example.com:443/dedup").code, first.code)
+        self.assertEqual(Link.objects.count(), 1)
+        self.mocks["dedup.remember"].assert_called_with(*first.dedup_key, first.code)
+
+    def test_scoped_per_owner_with_shared_anonymous_scope(self):
+        codes = {self._shorten(self.alice).code, self._shorten(self.bob).code, self._shorten().code}
+        self.assertEqual(len(codes), 3)
+        self.assertIn(self._shorten().code, codes)  # anonymous clients share one scope
+        self.assertEqual(Link.objects.count(), 3)
+
+    def test_scoped_per_expiry_and_redirect_type(self):
+        expire_at = timezone.now() + timedelta(days=1)
+        codes = [
+            self._shorten(self.alice).code,
+            self._shorten(self.alice, expire_at=expire_at).code,
+            self._shorten(self.alice, redirect_type=Link.RedirectType.PERMANENT).code,
+        ]
+        self.assertEqual(len(set(codes)), 3)
+        self.assertEqual(self._shorten(self.alice, expire_at=expire_at).code, codes[1])
+
+    def test_redis_hit_confirmed_by_cached_redirect(self):
+        link = self._shorten(self.alice)
+        self.mocks["dedup.get_code"].return_value = link.code
+        self.mocks["cache.get_cached_link"].return_value = CachedLink(self.URL, None, False)
+        with self.assertNumQueries(0):
+            probe = LinkCreateSerializer._find_duplicate(self.alice, {"original_url": self.URL})
+        self.assertEqual((probe.pk, probe.code), (link.pk, link.code))
+
+    def test_stale_redis_hit_falls_back_to_index(self):
+        link = self._shorten(self.alice)
+        other = self._shorten(self.alice, url="https://example.com/other")
+        # dedup entry points at `other`, whose redirect goes elsewhere (e.g. queryset.update)
+        self.mocks["dedup.get_code"].return_value = other.code
+        self.mocks["cache.get_cached_link"].return_value = CachedLink("https://example.com/other", None, False)
+        self.assertEqual(self._shorten(self.alice).code, link.code)
+
+        # same for a cached entry with another redirect policy, or no cached entry at all
+        self.mocks["cache.get_cached_link"].return_value = CachedLink(self.URL, None, True)
+        self.assertEqual(self._shorten(self.alice).code, link.code)
+        self.mocks["cache.get_cached_link"].return_value = None
+        self.assertEqual(self._shorten(self.alice).code, link.code)
+
+    def test_stale_redis_hit_without_indexed_match_creates(self):
+        other = self._shorten(self.alice, url="https://example.com/other")
+        self.mocks["dedup.get_code"].return_value = other.code
+        self.mocks["cache.get_cached_link"].return_value = CachedLink("https://example.com/other", None, False)
+        self.assertNotEqual(self._shorten(self.alice).code, other.code)
+        self.assertEqual(Link.objects.count(), 2)
+
+    def test_edit_forgets_old_entry(self):
+        link = self._shorten(self.alice)
+        old_key = link.dedup_key
+        link.original_url = "https://example.com/edited"
+        with self.captureOnCommitCallbacks(execute=True):
+            link.save()  # same instance as created, not reloaded
+        self.mocks["dedup.forget"].assert_called_once_with(*old_key)
+
+        # a second edit forgets the key written by the first
+        edited_key = link.dedup_key
+        link.redirect_type = Link.RedirectType.PERMANENT
+        with self.captureOnCommitCallbacks(execute=True):
+            link.save()
+        self.mocks["dedup.forget"].assert_called_with(*edited_key)
+
+    def test_edit_without_dedup_change_keeps_entry(self):
+        link = self._shorten(self.alice)
+        with self.captureOnCommitCallbacks(execute=True):
+            link.save()
+        self.mocks["dedup.forget"].assert_not_called()
+
+    def test_delete_forgets_entry(self):
+        link = self._shorten(self.alice)
+        key = link.dedup_key
+        with self.captureOnCommitCallbacks(execute=True):
+            link.delete()
+        self.mocks["dedup.forget"].assert_called_once_with(*key)
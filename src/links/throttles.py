@@ -0,0 +1,33 @@
+from rest_framework.throttling import BaseThrottle
+
+from . import helpers
+from .services import ratelimit as _ratelimit
+
+
+def rate_limit_identity(request) -> str:
+    """Authenticated users get their own bucket; everyone else is keyed by client IP."""
+    user = getattr(request, "user", None)
+    if user is not None and user.is_authenticated:
+        return f"user:{user.pk}"
+    return f"ip:{helpers.get_client_ip(request) or 'unknown'}"
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    DRF throttle backed by the Redis token bucket. The policy is picked by the
+    view's `throttle_scope` (see settings.RATE_LIMITS).
+    """
+
+    def __init__(self) -> None:
+        self._wait = None
+
+    def allow_request(self, request, view) -> bool:
+        scope = getattr(view, "throttle_scope", None)
+        if not scope:
+            return True
+        decision, _ = _ratelimit.hit(scope, rate_limit_identity(request))
+        self._wait = decision.retry_after
+        return decision.allowed
+
+    def wait(self):
+        return self._wait
@@ -2,8 +2,11 @@ from django.urls import path
 from .views import (
     LinkCreateAPIView, 
     RedirectView,
+    BeaconView,
     UserLinkListAPIView,
     AnalyticsAPIView,
+    RedisHealthAPIView,
+    CacheReportAPIView,
     )
 
 app_name = "links"
@@ -11,6 +14,9 @@ app_name = "links"
 urlpatterns = [
     path('create/', LinkCreateAPIView.as_view(), name='create_link'),
     path('r/<str:code>/', RedirectView.as_view(), name='redirect'),
+    path('b/<str:code>/', BeaconView.as_view(), name='beacon'),
     path('list/', UserLinkListAPIView.as_view(), name='list_links'),
     path('analytics/<str:code>/', AnalyticsAPIView.as_view(), name='analytics'),
+    path('health/redis/', RedisHealthAPIView.as_view(), name='redis_health'),
+    path('health/cache/', CacheReportAPIView.as_view(), name='cache_report'),
 ]
@@ -1,59 +1,175 @@
+import hashlib
+import json
+import math
+import time
+from django.conf import settings
+from django.core.cache import cache as _django_cache
+from django_redis.exceptions import ConnectionInterrupted
+from redis.exceptions import RedisError
 from django.utils import timezone
-from django.shortcuts import redirect, get_object_or_404
+from django.utils.cache import parse_etags, patch_cache_control, quote_etag
+from django.shortcuts import get_object_or_404
+from django.utils.decorators import method_decorator
 from django.views import View
-from django.http import HttpResponseGone, Http404
+from django.views.decorators.csrf import csrf_exempt
+from django.http import (
+    HttpResponse,
+    HttpResponseGone,
+    HttpResponsePermanentRedirect,
+    HttpResponseRedirect,
+    Http404,
+)
 from rest_framework.generics import CreateAPIView, ListAPIView, GenericAPIView
 from django.views import View
 from rest_framework import permissions
 from rest_framework.response import Response
 from rest_framework import status
-from .serializers import LinkCreateSerializer, LinkListSerializer
+from .serializers import (
+    LINK_LIST_FIELDS,
+    LinkCreateSerializer,
+    LinkListSerializer,
+    serialize_link_rows,
+)
 from .models import Link
-from .services.base62 import decoder as _decode_base64
+from .services.base62 import decoder as _decode_base64, is_valid_code as _is_valid_code
 from .services import cache as _cache
+from .services import ratelimit as _ratelimit
 from .services.analytics import LinkAnalytics
+from config.breaker import get_breaker as _get_breaker, snapshot_all as _breaker_snapshot
+from .throttles import TokenBucketThrottle
 from . import helpers
+from . import profiling as _profiling
 
 
 class LinkCreateAPIView( CreateAPIView):
     serializer_class = LinkCreateSerializer
+    throttle_classes = [TokenBucketThrottle]
+    throttle_scope = "create"
 
 class RedirectView(View):
+    rate_limit_scope = "redirect"
+
     def get(self, request, code: str):
-        # 1) Fast-fail if tombstoned
-        if _cache.is_tombstoned(code):
-            return HttpResponseGone("Link expired")
+        entry = self._resolve(request, code)
+        if isinstance(entry, HttpResponse):
+            return entry
+
+        # Record analytics, then redirect
+        with _profiling.span("analytics"):
+            self._record(request, code)
+        with _profiling.span("response"):
+            return self._build_redirect(entry)
 
-        # 2) Try cache
-        url = _cache.get_cached_url(code)
+    def _resolve(self, request, code: str) -> _cache.CachedLink | HttpResponse:
+        # 0) Reject malformed/out-of-range codes before any Redis or DB work
+        if not _is_valid_code(code):
+            raise Http404
+
+        # 1) Rate limit by client IP; the cache reads ride on the same round trip
+        ip = helpers.get_client_ip(request) or "unknown"
+        with _profiling.span("cache_lookup"):
+            decision, values = _ratelimit.hit(
+                self.rate_limit_scope, f"ip:{ip}", read_keys=_cache.lookup_keys(code)
+            )
+            if not decision.allowed:
+                return self._too_many_requests(decision.retry_after)
+            if values is not None:
+                tombstoned, entry = _cache.parse_lookup(values)
+            else:
+                # limiter disabled/unavailable: one MGET (a miss while Redis is down)
+                tombstoned, entry = _cache.lookup(code)
+
+        # 2) Fast-fail if tombstoned, else serve from cache
+        if tombstoned:
+            return HttpResponseGone("Link expired")
+        if entry:
+            _cache.record_lookup(entry.tier, hit=True, code=code)
+            return entry
 
         # 3) Fallback to DB
-        if not url:
+        with _profiling.span("db_fallback"):
             link = self._get_link_or_404(code)
         if link.is_expired:
             _cache.mark_expired(code)
             return HttpResponseGone("Link expired")
 
-        # Cache fresh mapping
-        expire_ts = int(link.expire_at.timestamp()) if link.expire_at else None
-        _cache.cache_url(code, link.original_url, expire_ts)
-        url = link.original_url
+        # Cache fresh mapping; the TTL tier follows recent visit frequency
+        with _profiling.span("cache_fill"):
+            recent = LinkAnalytics.get_recent_visits(code)
+            tier = _cache.cache_url(
+                code, link.original_url, link.expire_at_ts, link.is_permanent, recent
+            )
+            _cache.record_lookup(tier, hit=False)
+        return _cache.CachedLink(link.original_url, link.expire_at_ts, link.is_permanent)
 
-        # 4) Record analytics, then redirect
-        self._record(request, code)
-        return redirect(url)
+    @staticmethod
+    def _too_many_requests(retry_after: float) -> HttpResponse:
+        response = HttpResponse("Too many requests", status=429)
+        response["Retry-After"] = str(max(1, math.ceil(retry_after)))
+        return response
+
+    @staticmethod
+    def _build_redirect(entry: _cache.CachedLink) -> HttpResponse:
+        if entry.permanent:
+            response = HttpResponsePermanentRedirect(entry.url)
+            max_age = int(getattr(settings, "REDIRECT_CACHE_MAX_AGE", 86400))
+        else:
+            response = HttpResponseRedirect(entry.url)
+            max_age = int(getattr(settings, "REDIRECT_TEMPORARY_MAX_AGE", 0))
+
+        # never let a CDN/browser keep the redirect past the link's expiry
+        if entry.expire_at_ts is not None:
+            max_age = min(max_age, entry.expire_at_ts - int(time.time()))
+
+        if max_age > 0:
+            patch_cache_control(response, public=True, max_age=max_age)
+        else:
+            # every click must reach us (and the analytics counters)
+            patch_cache_control(response, private=True, no_cache=True)
+        return response
 
     @staticmethod
     def _get_link_or_404(code: str) -> Link:
         link_id = _decode_base64(code)
-        qs = Link.objects.only("original_url", "expire_at")
+        qs = Link.objects.only("original_url", "expire_at", "redirect_type")
         return get_object_or_404(qs, pk=link_id)
 
     def _record(self, request, code: str) -> None:
         ip = helpers.get_client_ip(request)
         ua = helpers.get_user_agent(request)
-        LinkAnalytics.record_visit(code, ip, ua)
-    
+        today = LinkAnalytics.record_visit(code, ip, ua, self._referrer(request))
+        _cache.maybe_promote(code, today)
+
+    def _referrer(self, request) -> str | None:
+        return helpers.get_referrer(request)
+
+
+@method_decorator(csrf_exempt, name="dispatch")
+class BeaconView(RedirectView):
+    """
+    Lightweight visit beacon for redirects served from a browser/CDN cache.
+    Landing pages (or clients) can ping it to keep visit counts accurate.
+    """
+
+    rate_limit_scope = "beacon"
+
+    def get(self, request, code: str):
+        entry = self._resolve(request, code)
+        if isinstance(entry, HttpResponse):
+            return entry
+        self._record(request, code)
+        response = HttpResponse(status=204)
+        patch_cache_control(response, no_store=True)
+        return response
+
+    def post(self, request, code: str):
+        return self.get(request, code)
+
+    def _referrer(self, request) -> str | None:
+        # The beacon's own Referer is the landing page; the landing page passes
+        # its document.referrer (the page with the short link) as ?ref=.
+        return request.GET.get("ref")
+
 class UserLinkListAPIView(ListAPIView):
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = LinkListSerializer
@@ -61,14 +177,81 @@ class UserLinkListAPIView(ListAPIView):
     def get_queryset(self):
         return (
             Link.objects.filter(created_by=self.request.user)
-            .only("original_url", "expire_at", "created_at")
+            .only(*LINK_LIST_FIELDS)
             .order_by("-created_at")
         )
 
+    def list(self, request, *args, **kwargs):
+        # LinkListSerializer documents the shape; rows are built without it.
+        queryset = self.filter_queryset(self.get_queryset()).values_list(*LINK_LIST_FIELDS)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(serialize_link_rows(page, request))
+        return Response(serialize_link_rows(queryset, request))
+
+def _report_cache(fn, *args):
+    """Django cache call through the Redis breaker; None while Redis is unavailable."""
+    def run():
+        try:
+            return fn(*args)
+        except ConnectionInterrupted as e:
+            # django-redis wraps the redis-py error the breaker classifies
+            if isinstance(e.__cause__, RedisError):
+                raise e.__cause__ from None
+            raise RedisError(str(e)) from e
+
+    return _get_breaker("default").call(run)
+
+
 class AnalyticsAPIView(GenericAPIView):
     def get(self, request, code=None):
+        if not _is_valid_code(code):
+            raise Http404
+        daily = request.query_params.get('daily') == 'true'
+        dims = request.query_params.get('dimensions') == 'true'
+        ttl = int(getattr(settings, "ANALYTICS_CACHE_TTL", 10))
+        report = self._get_report(code, daily, dims, ttl)
+
+        if_none_match = request.headers.get("If-None-Match")
+        if if_none_match and report["etag"] in parse_etags(if_none_match):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = Response(report["data"])
+        response["ETag"] = report["etag"]
+        patch_cache_control(response, private=True, max_age=ttl)
+        return response
+
+    @staticmethod
+    def _get_report(code: str, daily: bool, dims: bool, ttl: int) -> dict:
+        # Short-lived cache so dashboard polling doesn't recompute counts.
+        key = f"analytics:{code}:{'daily' if daily else 'totals'}:{'dims' if dims else 'nodims'}"
+        report = _report_cache(_django_cache.get, key) if ttl > 0 else None
+        if report is not None:
+            return report
+
         counts = LinkAnalytics.get_counts(code)
         data = {"code": code, **counts}
-        if request.query_params.get('daily') == 'true':
+        if daily:
             data["daily"] = LinkAnalytics.get_daily(code)
-        return Response(data)
\ No newline at end of file
+        if dims:
+            data.update(LinkAnalytics.get_dimensions(code))
+        body = json.dumps(data, sort_keys=True, separators=(",", ":")).encode()
+        report = {"etag": quote_etag(hashlib.md5(body).hexdigest()), "data": data}
+        if ttl > 0:
+            _report_cache(_django_cache.set, key, report, ttl)
+        return report
+
+class RedisHealthAPIView(GenericAPIView):
+    """Circuit-breaker state per Redis alias (0=closed, 1=half_open, 2=open)."""
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response({"breakers": _breaker_snapshot()})
+
+
+class CacheReportAPIView(GenericAPIView):
+    """Hit ratio per TTL tier, pinned hot-set size and Redis memory vs budget."""
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response(_cache.tier_report())